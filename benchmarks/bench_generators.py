@@ -0,0 +1,271 @@
+# times each generator on its own, with projects that are parsed once beforehand and passed straight into
+# create_project, projects_finished and create_master_file, and checks the output against golden files
+# usage:
+#   python3 benchmarks/bench_generators.py --save-goldens goldens/    (before changing a generator)
+#   python3 benchmarks/bench_generators.py --goldens goldens/         (after, fails if any output changed)
+#   python3 benchmarks/bench_generators.py --sizes 10 100 500 -o results.json [--compare baseline.json]
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from time import perf_counter
+
+import synthetic_tree
+from bench_runs import copy_qpc
+
+QPC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+RESULTS_VERSION = 1
+GENERATORS = ("compile_commands", "makefile", "ninja", "visual_studio")
+PHASES = ("create_project", "projects_finished", "create_master_file")
+
+# vs makes a new random guid for each project, these get numbered in the order they show up instead
+GUID_PATTERN = re.compile(r"\{[0-9A-F]{8}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{4}-[0-9A-F]{12}\}")
+
+HANDLER = None
+QPC_COPY_DIR = ""  # qpc is imported from a copy, so its hashes don't end up in this repo
+
+
+def _init_qpc(tree_dir: str) -> None:
+    global HANDLER
+    sys.argv = [sys.argv[0], "-d", tree_dir, "-b", "_qpc_scripts/_default.qpc_base", "-a", "everything",
+                "-g", *GENERATORS, "-p", "linux", "windows", "-mf", "all", "-w"]
+    from qpc_args import parse_args
+    from qpc_generator_handler import GeneratorHandler
+    import qpc_hash
+
+    HANDLER = HANDLER or GeneratorHandler()
+    parse_args(HANDLER.get_generator_args())
+    if not HANDLER.project_generators:
+        HANDLER.post_args_init()
+        qpc_hash.post_args_init()
+
+
+def _new_generator(name: str):
+    # a new one each run, since generators keep everything they were given until projects_finished
+    generator = HANDLER._init_generator(name)
+    generator.post_args_init()
+    return generator
+
+
+# parses every project in the tree once, the same as qpc.py does
+def create_fixtures(tree_dir: str) -> tuple:
+    from qpc_args import args
+    from qpc_parser import Parser
+    import qpc_hash
+
+    os.chdir(tree_dir)
+    parser = Parser()
+    info = parser.parse_base_info(args.base_file)
+    projects = []
+    for project_def in info.projects:
+        project_dir = os.path.join(tree_dir, os.path.split(project_def.path)[0])
+        os.chdir(project_dir)
+        project = parser.parse_project(project_def, project_def.path, info, HANDLER.project_generators)
+        os.chdir(tree_dir)
+        if project:
+            info.add_project_dependencies(project_def.path, project.dependencies)
+            info.project_hashes[project_def.path] = qpc_hash.get_hash_file_path(project_def.path)
+            projects.append((project_dir, project))
+    return info, projects
+
+
+def run_generator(name: str, tree_dir: str, info, projects: list) -> dict:
+    from qpc_base import GENERATED_FILES
+
+    GENERATED_FILES.clear()
+    generator = _new_generator(name)
+    times = {}
+
+    start = perf_counter()
+    for project_dir, project in projects:
+        os.chdir(project_dir)
+        generator.create_project(project)
+    os.chdir(tree_dir)
+    times["create_project"] = perf_counter() - start
+
+    start = perf_counter()
+    generator.projects_finished()
+    times["projects_finished"] = perf_counter() - start
+
+    start = perf_counter()
+    if generator.generates_master_file():
+        generator.create_master_file(info, generator.get_master_file_path("all"))
+    times["create_master_file"] = perf_counter() - start
+
+    return times
+
+
+def get_outputs(tree_dir: str) -> dict:
+    from qpc_base import GENERATED_FILES
+
+    outputs = {}
+    guids = {}
+    tree_dir = tree_dir.replace("\\", "/").rstrip("/")
+    for file_path in sorted(GENERATED_FILES):
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            text = file.read()
+        # so the output doesn't depend on where the tree or qpc is
+        text = text.replace(tree_dir, "$TREE").replace(QPC_COPY_DIR.replace("\\", "/"), "$QPC")
+        text = GUID_PATTERN.sub(lambda match: guids.setdefault(match.group(0), f"{{GUID-{len(guids)}}}"), text)
+        outputs[os.path.relpath(file_path, tree_dir).replace("\\", "/")] = text
+    return outputs
+
+
+def bench_size(project_count: int, file_count: int, generators: list, repeat: int, temp_dir: str) -> tuple:
+    tree_dir = os.path.join(temp_dir, f"tree_{project_count}")
+    synthetic_tree.create_tree(tree_dir, {"projects": project_count, "files": file_count})
+    # qpc prints a lot, none of it is needed here
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        _init_qpc(tree_dir)
+        info, projects = create_fixtures(tree_dir)
+
+    results = {}
+    outputs = {}
+    for name in generators:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            runs = [run_generator(name, tree_dir, info, projects) for _ in range(repeat)]
+
+            # separate run for memory, since tracemalloc slows everything down
+            # it only sees python allocations, so memory lxml uses for visual studio isn't counted
+            tracemalloc.start()
+            run_generator(name, tree_dir, info, projects)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        times = {phase: min(run[phase] for run in runs) for phase in PHASES}
+        times["total"] = min(sum(run.values()) for run in runs)
+        times["peak_memory"] = peak_memory
+
+        outputs[name] = get_outputs(tree_dir)
+        times["outputs"] = {path: hashlib.sha256(text.encode("utf-8")).hexdigest()
+                            for path, text in outputs[name].items()}
+        results[name] = times
+
+        print(f"{name:<20} {project_count:>6} projects  " +
+              "  ".join(f"{phase} {times[phase] * 1000:>8.2f}ms" for phase in PHASES) +
+              f"  peak {times['peak_memory'] / (1024 * 1024):.1f}MiB")
+
+    return results, outputs
+
+
+def save_goldens(golden_dir: str, size: str, outputs: dict) -> None:
+    for generator, files in outputs.items():
+        for path, text in files.items():
+            golden_path = os.path.join(golden_dir, size, generator, path)
+            os.makedirs(os.path.dirname(golden_path), exist_ok=True)
+            with open(golden_path, mode="w", encoding="utf-8", newline="") as golden_file:
+                golden_file.write(text)
+
+
+# returns the outputs that don't match the goldens byte for byte
+def check_goldens(golden_dir: str, size: str, outputs: dict) -> list:
+    mismatches = []
+    for generator, files in outputs.items():
+        generator_dir = os.path.join(golden_dir, size, generator)
+        golden_paths = set()
+        for root, dirs, file_names in os.walk(generator_dir):
+            for file_name in file_names:
+                golden_paths.add(os.path.relpath(os.path.join(root, file_name), generator_dir).replace("\\", "/"))
+
+        for path in sorted(golden_paths | set(files)):
+            if path not in files:
+                mismatches.append(f"{size} {generator}: {path} is no longer written")
+            elif path not in golden_paths:
+                mismatches.append(f"{size} {generator}: {path} is new")
+            else:
+                with open(os.path.join(generator_dir, path), mode="r", encoding="utf-8", newline="") as golden_file:
+                    if golden_file.read() != files[path]:
+                        mismatches.append(f"{size} {generator}: {path} is different")
+    return mismatches
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list:
+    problems = []
+    print(f"\n{'Size':<10} {'Generator':<20} {'Baseline ms':>12} {'Current ms':>12} {'Change':>8}")
+    for size, generators in current["results"].items():
+        for name, result in generators.items():
+            base_result = baseline["results"].get(size, {}).get(name)
+            if not base_result:
+                continue
+            change = result["total"] / base_result["total"] - 1
+            flag = ""
+            if change > threshold:
+                flag = " !"
+                problems.append(f"{size} {name}: {change:+.1%} slower")
+            if result["outputs"] != base_result["outputs"]:
+                flag += " output changed"
+                problems.append(f"{size} {name}: output changed")
+            print(f"{size:<10} {name:<20} {base_result['total'] * 1000:>12.2f} {result['total'] * 1000:>12.2f} "
+                  f"{change:>+8.1%}{flag}")
+    return problems
+
+
+def main():
+    # sets are ordered by hash, and some generators write them out in that order
+    if os.environ.get("PYTHONHASHSEED") != "0":
+        os.environ["PYTHONHASHSEED"] = "0"
+        os.execv(sys.executable, [sys.executable, *sys.argv])
+
+    arg_parser = argparse.ArgumentParser(description="Benchmark generators on already parsed projects")
+    arg_parser.add_argument("--generators", "-g", nargs="+", default=GENERATORS, choices=GENERATORS)
+    arg_parser.add_argument("--sizes", "-s", nargs="+", type=int, default=(10, 50, 200), help="Project counts")
+    arg_parser.add_argument("--files", type=int, default=20, help="Source files in each project")
+    arg_parser.add_argument("--repeat", "-r", type=int, default=3)
+    arg_parser.add_argument("--out", "-o", default="", help="Write results to this json file")
+    arg_parser.add_argument("--compare", "-c", default="", help="Compare against results from an older run")
+    arg_parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown that counts as a regression")
+    arg_parser.add_argument("--save-goldens", default="", help="Write the output of each generator to this folder")
+    arg_parser.add_argument("--goldens", default="", help="Check the output of each generator against this folder")
+    parsed_args = arg_parser.parse_args()
+
+    global QPC_COPY_DIR
+    results = {}
+    problems = []
+    with tempfile.TemporaryDirectory(prefix="qpc_bench_gen_") as temp_dir:
+        QPC_COPY_DIR = os.path.dirname(copy_qpc(QPC_DIR, os.path.join(temp_dir, "qpc")))
+        sys.path.insert(0, QPC_COPY_DIR)
+        for project_count in parsed_args.sizes:
+            size = f"{project_count}x{parsed_args.files}"
+            results[size], outputs = bench_size(project_count, parsed_args.files, parsed_args.generators,
+                                                parsed_args.repeat, temp_dir)
+            if parsed_args.save_goldens:
+                save_goldens(os.path.abspath(parsed_args.save_goldens), size, outputs)
+            if parsed_args.goldens:
+                problems += check_goldens(os.path.abspath(parsed_args.goldens), size, outputs)
+        os.chdir(QPC_DIR)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "files": parsed_args.files,
+        "results": results,
+    }
+
+    if parsed_args.out:
+        with open(parsed_args.out, mode="w", encoding="utf-8") as out_file:
+            json.dump(results, out_file, indent=1)
+
+    if parsed_args.compare:
+        with open(parsed_args.compare, mode="r", encoding="utf-8") as baseline_file:
+            problems += compare_results(json.load(baseline_file), results, parsed_args.threshold)
+
+    if problems:
+        print("\n" + "\n".join(problems))
+        return 1
+    if parsed_args.goldens:
+        print("\nAll outputs match the goldens")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
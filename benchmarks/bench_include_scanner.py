@@ -0,0 +1,75 @@
+# compares the line by line include scanner against the mmap one in qpc_c_parser
+# usage: python3 benchmarks/bench_include_scanner.py [file count] [lines per file]
+
+import os
+import sys
+import random
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qpc_c_parser
+
+
+LICENSE_HEADER = "/*\n * Copyright (c) Someone\n *\n * Permission is hereby granted, free of charge\n */\n\n"
+
+
+# roughly what a translation unit in a big c++ codebase looks like:
+# a license comment, a block of includes and a lot of code
+def create_source_file(path: str, line_count: int, rand: random.Random) -> None:
+    lines = [LICENSE_HEADER, "#pragma once\n"]
+    for i in range(rand.randint(20, 60)):
+        if rand.random() < 0.3:
+            lines.append(f"#include <lib_{i}/header_{i}.h>\n")
+        else:
+            lines.append(f"#include \"module_{i}/header_{i}.h\"\n")
+    lines.append("\n// memdbgon must be the last include file in a .cpp file!!!\n#include \"tier0/memdbgon.h\"\n\n")
+
+    for i in range(line_count):
+        indent = "\t" * rand.randint(0, 3)
+        lines.append(f"{indent}int value_{i} = some_function(value_{i - 1}, \"string {i}\"); // comment {i}\n")
+
+    with open(path, "w") as file:
+        file.write("".join(lines))
+
+
+def bench(name: str, func, paths: list, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        for path in paths:
+            func(path)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<24} {best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    line_count = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    rand = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        paths = []
+        for i in range(file_count):
+            path = os.path.join(temp_dir, f"file_{i}.cpp")
+            create_source_file(path, line_count, rand)
+            paths.append(path)
+
+        for path in paths:
+            lines_result = qpc_c_parser._read_include_names_lines(path)
+            if qpc_c_parser._read_include_names(path) != lines_result or \
+                    qpc_c_parser._read_include_names(path, True) != lines_result:
+                raise Exception("Scanners found different includes in " + path)
+
+        print(f"{file_count} files, {line_count} lines of code each")
+        lines_time = bench("line by line", qpc_c_parser._read_include_names_lines, paths, 5)
+        mmap_time = bench("mmap", qpc_c_parser._read_include_names, paths, 5)
+        stop_time = bench("mmap + stop early", lambda path: qpc_c_parser._read_include_names(path, True), paths, 5)
+        print(f"mmap is {lines_time / mmap_time:.1f}x faster, {lines_time / stop_time:.1f}x with stop early")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# times cold, warm and no-op runs of qpc.py on a synthetic tree for each generator
+# cold: no hashes, everything is parsed and generated
+# warm: one project script changed, only that project is regenerated
+# noop: nothing changed, nothing is regenerated
+# usage: python3 benchmarks/bench_runs.py [--out results.json] [--compare baseline.json] [--projects N] ...
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from time import perf_counter
+
+import synthetic_tree
+
+
+RESULTS_VERSION = 1
+QPC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# the platform each generator is run with
+GENERATOR_PLATFORMS = {
+    "makefile": "linux",
+    "ninja": "linux",
+    "compile_commands": "linux",
+    "visual_studio": "windows",
+}
+
+SCENARIOS = ("cold", "warm", "noop")
+
+
+def get_revision() -> str:
+    try:
+        return subprocess.run(["git", "-C", QPC_DIR, "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+# qpc keeps its hashes next to qpc.py, so each benchmark gets its own copy of qpc
+def copy_qpc(qpc_dir: str, out_dir: str) -> str:
+    ignore = shutil.ignore_patterns("hashes", ".git", "benchmarks", "__pycache__", "*.pyc")
+    shutil.copytree(qpc_dir, out_dir, ignore=ignore)
+    return os.path.join(out_dir, "qpc.py")
+
+
+def run_qpc(qpc_path: str, tree_dir: str, generator: str) -> float:
+    cmd = [sys.executable, qpc_path, "-b", "_qpc_scripts/_default.qpc_base", "-a", "everything",
+           "-g", generator, "-p", GENERATOR_PLATFORMS[generator], "-mf", "all"]
+    start = perf_counter()
+    result = subprocess.run(cmd, cwd=tree_dir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    time = perf_counter() - start
+    if result.returncode:
+        raise RuntimeError(f"qpc failed with {generator}:\n{result.stderr}")
+    return time
+
+
+def touch_project(tree_dir: str, count: int) -> None:
+    # changes the contents, since qpc hashes the scripts instead of checking mtimes
+    with open(os.path.join(tree_dir, "project_0", "project_0.qpc"), mode="a", encoding="utf-8") as script:
+        script.write(f"// change {count}\n")
+
+
+def summarize(times: list) -> dict:
+    return {"min": min(times), "median": statistics.median(times), "runs": len(times)}
+
+
+def bench_generator(qpc_path: str, tree_dir: str, generator: str, repeat: int) -> dict:
+    hash_dir = os.path.join(os.path.dirname(qpc_path), "hashes")
+    times = {scenario: [] for scenario in SCENARIOS}
+
+    for count in range(repeat):
+        shutil.rmtree(hash_dir, ignore_errors=True)
+        times["cold"].append(run_qpc(qpc_path, tree_dir, generator))
+
+        touch_project(tree_dir, count)
+        times["warm"].append(run_qpc(qpc_path, tree_dir, generator))
+
+        times["noop"].append(run_qpc(qpc_path, tree_dir, generator))
+
+    return {scenario: summarize(scenario_times) for scenario, scenario_times in times.items()}
+
+
+def run_benchmarks(settings: dict, generators: list, repeat: int, qpc_dir: str = QPC_DIR) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="qpc_bench_") as temp_dir:
+        qpc_path = copy_qpc(qpc_dir, os.path.join(temp_dir, "qpc"))
+        for generator in generators:
+            # a new tree for each generator, so output from the last one isn't in the way
+            tree_dir = os.path.join(temp_dir, "tree_" + generator)
+            synthetic_tree.create_tree(tree_dir, settings)
+            results[generator] = bench_generator(qpc_path, tree_dir, generator, repeat)
+            print(f"{generator:<20} " + "  ".join(f"{scenario} {results[generator][scenario]['median']:.3f}s"
+                                                   for scenario in SCENARIOS))
+
+    return {
+        "version": RESULTS_VERSION,
+        "workload": settings,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "revision": get_revision(),
+        "results": results,
+    }
+
+
+# returns a list of regressions, anything slower than the baseline by more than the threshold
+# times under the noise floor are ignored, since process startup is most of those
+def compare_results(baseline: dict, current: dict, threshold: float, noise_floor: float) -> list:
+    regressions = []
+    if baseline.get("workload") != current.get("workload"):
+        print("warning: baseline was run with a different workload")
+
+    print(f"\n{'Generator':<20} {'Scenario':<8} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    for generator, scenarios in current["results"].items():
+        for scenario, result in scenarios.items():
+            base_result = baseline.get("results", {}).get(generator, {}).get(scenario)
+            if not base_result:
+                continue
+            base_time = base_result["median"]
+            time = result["median"]
+            change = (time - base_time) / base_time if base_time else 0.0
+            flag = ""
+            if change > threshold and time - base_time > noise_floor:
+                flag = " !"
+                regressions.append({"generator": generator, "scenario": scenario, "baseline": base_time,
+                                    "current": time, "change": change})
+            print(f"{generator:<20} {scenario:<8} {base_time:>10.3f} {time:>10.3f} {change:>+8.1%}{flag}")
+
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark qpc runs on a synthetic tree")
+    arg_parser.add_argument("--generators", "-g", nargs="+", default=list(GENERATOR_PLATFORMS),
+                            choices=list(GENERATOR_PLATFORMS))
+    arg_parser.add_argument("--repeat", "-r", type=int, default=3, help="Runs of each scenario, the median is compared")
+    arg_parser.add_argument("--out", "-o", default="", help="Write results to this json file")
+    arg_parser.add_argument("--compare", "-c", default="", help="Compare against results from an older run")
+    arg_parser.add_argument("--threshold", type=float, default=0.1, help="Slowdown that counts as a regression")
+    arg_parser.add_argument("--noise-floor", type=float, default=0.02,
+                            help="Slowdowns smaller than this in seconds are never regressions")
+    synthetic_tree.add_settings_args(arg_parser)
+    parsed_args = arg_parser.parse_args()
+
+    results = run_benchmarks(synthetic_tree.get_settings(parsed_args), parsed_args.generators, parsed_args.repeat)
+
+    if parsed_args.out:
+        with open(parsed_args.out, mode="w", encoding="utf-8") as out_file:
+            json.dump(results, out_file, indent=1)
+        print("Wrote results: " + parsed_args.out)
+
+    if parsed_args.compare:
+        with open(parsed_args.compare, mode="r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(baseline, results, parsed_args.threshold, parsed_args.noise_floor)
+        if regressions:
+            print(f"{len(regressions)} regressions over {parsed_args.threshold:.0%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,398 @@
+# microbenchmarks for the hot parts of qpc: the lexer, condition solver, macro expansion, QPCBlock.to_string
+# and the include scanner, all run on the same seeded corpora every time
+# usage:
+#   python3 benchmarks/microbench.py [--out results.json] [--compare baseline.json] [--filter lexer]
+#   python3 benchmarks/microbench.py --revs HEAD~5 HEAD   (runs this file against both git revisions of qpc)
+
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from time import perf_counter
+
+
+RESULTS_VERSION = 1
+QPC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# each sample runs the benchmark enough times to take at least this long
+SAMPLE_TIME = 0.05
+
+
+# ==================================================================================================
+# Corpora
+# ==================================================================================================
+
+MACRO_NAMES = ["WINDOWS", "POSIX", "LINUX", "MACOS", "DEBUG", "RELEASE", "X64", "ARM64", "SOURCE", "DEDICATED"]
+
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        file.write(text)
+
+
+def _random_condition(rand: random.Random) -> str:
+    macro_a = "$" + rand.choice(MACRO_NAMES)
+    macro_b = "$" + rand.choice(MACRO_NAMES)
+    macro_c = "$" + rand.choice(MACRO_NAMES)
+    return rand.choice([
+        macro_a,
+        "!" + macro_a,
+        f"{macro_a} && {macro_b}",
+        f"{macro_a} || !{macro_b}",
+        f"({macro_a} || {macro_b}) && !{macro_c}",
+        f"{macro_a} && ({macro_b} || !$MISSING)",
+        f"$VERSION >= {rand.randint(1, 9)}",
+        f"$COMPILER == msvc || $COMPILER == clang",
+    ])
+
+
+# a qpc script for each shape of file the lexer sees a lot of
+def create_lexer_corpus(out_dir: str, rand: random.Random) -> dict:
+    paths = {}
+
+    # long lists of files, like a big files block
+    lines = ["files", "{", '\tfolder "Source Files"', "\t{"]
+    lines += [f'\t\t"src/module_{i // 50}/file_{i}.cpp"' for i in range(2000)]
+    lines += ["\t}", "}"]
+    paths["flat"] = os.path.join(out_dir, "flat.qpc")
+    _write(paths["flat"], "\n".join(lines))
+
+    # deeply nested blocks
+    lines = []
+    for i in range(150):
+        for depth in range(10):
+            lines.append("\t" * depth + f"block_{depth} \"value {i}\"")
+            lines.append("\t" * depth + "{")
+        lines.append("\t" * 10 + f"key_{i} \"value\"")
+        for depth in reversed(range(10)):
+            lines.append("\t" * depth + "}")
+    paths["nested"] = os.path.join(out_dir, "nested.qpc")
+    _write(paths["nested"], "\n".join(lines))
+
+    # most items have conditions
+    lines = ["configuration", "{", "\tcompiler", "\t{", "\t\tpreprocessor_definitions", "\t\t{"]
+    lines += [f'\t\t\t"DEFINE_{i}" [{_random_condition(rand)}]' for i in range(1500)]
+    lines += ["\t\t}", "\t}", "}"]
+    paths["conditions"] = os.path.join(out_dir, "conditions.qpc")
+    _write(paths["conditions"], "\n".join(lines))
+
+    # lots of comments, and some commented out blocks
+    lines = []
+    for i in range(800):
+        lines.append(f"// comment {i} explaining something about the next item in some detail")
+        if i % 10 == 0:
+            lines.append(f"/*\nold_block_{i}\n{{\n\t\"removed\"\n}}\n*/")
+        lines.append(f'macro MACRO_{i} "{i}" // trailing comment')
+    paths["comments"] = os.path.join(out_dir, "comments.qpc")
+    _write(paths["comments"], "\n".join(lines))
+
+    # long quoted values with escapes
+    lines = ["configuration", "{", "\tcompiler", "\t{", "\t\toptions", "\t\t{"]
+    lines += [f'\t\t\t"/D \\"NAME_{i}=\\\\\\"value {i}\\\\\\"\\" /I \\"some/long/include/path/{i}\\""'
+              for i in range(1500)]
+    lines += ["\t\t}", "\t}", "}"]
+    paths["quotes"] = os.path.join(out_dir, "quotes.qpc")
+    _write(paths["quotes"], "\n".join(lines))
+
+    return paths
+
+
+def create_condition_corpus(rand: random.Random) -> tuple:
+    macros = {"$" + name: rand.choice(("0", "1")) for name in MACRO_NAMES}
+    macros["$VERSION"] = "5"
+    macros["$COMPILER"] = "clang"
+    # most items in real scripts have no condition, and the lexer removes spaces from them
+    conditions = ["" if rand.random() < 0.5 else _random_condition(rand).replace(" ", "") for _ in range(1000)]
+    return conditions, macros
+
+
+def create_macro_corpus(rand: random.Random, macro_count: int) -> tuple:
+    macros = {f"$MACRO_{i}": f"value_{i}" for i in range(macro_count)}
+    macros.update({"$ROOT_DIR": "/home/user/project", "$PROJECT_NAME": "project", "$OUT_DIR": "../bin"})
+    names = list(macros)
+    strings = []
+    for i in range(1000):
+        kind = rand.random()
+        if kind < 0.4:
+            strings.append(f"src/file_{i}.cpp")
+        elif kind < 0.8:
+            strings.append(f"{rand.choice(names)}/src/file_{i}.cpp")
+        else:
+            strings.append(f"{rand.choice(names)}/{rand.choice(names)}_{i}/{rand.choice(names)}")
+    return strings, macros
+
+
+# source files that include a chain of headers, with some system headers mixed in
+def create_include_corpus(out_dir: str, rand: random.Random) -> tuple:
+    include_dirs = [os.path.join(out_dir, "public"), os.path.join(out_dir, "public", "tier0")]
+    for i in range(100):
+        includes = [f'#include "header_{i - 1}.h"\n' if i else "", "#include <stdio.h>\n"]
+        _write(os.path.join(include_dirs[i % 2], f"header_{i}.h"), "#pragma once\n" + "".join(includes))
+
+    paths = []
+    for i in range(200):
+        includes = [f'#include "header_{rand.randrange(100)}.h"\n' for _ in range(rand.randint(1, 8))]
+        includes.append('#include "missing.h"\n')
+        code = "".join(f"int func_{i}_{j}() {{ return {j}; }}\n" for j in range(50))
+        path = os.path.join(out_dir, "src", f"file_{i}.cpp")
+        _write(path, "// license\n\n" + "".join(includes) + "\n" + code)
+        paths.append(path)
+
+    return paths, include_dirs
+
+
+# ==================================================================================================
+# Benchmarks
+# each setup function returns the function to time, it does the same work every call
+# ==================================================================================================
+
+def _import_qpc():
+    # qpc modules read from args, so give them the defaults they need without parsing the command line
+    from qpc_args import args
+    for name, value in {"verbose": False, "hide_warnings": True, "root_dir": os.getcwd(), "time": False}.items():
+        if not hasattr(args, name):
+            setattr(args, name, value)
+
+    # same order as qpc.py, qpc_project can't be imported before qpc_parser
+    import qpc_reader
+    import qpc_parser
+    import qpc_project
+    import qpc_c_parser
+    return qpc_reader, qpc_project, qpc_c_parser
+
+
+def setup_lexer(temp_dir: str, shape: str):
+    qpc_reader = _import_qpc()[0]
+    path = create_lexer_corpus(os.path.join(temp_dir, "lexer"), random.Random(0))[shape]
+    return lambda: qpc_reader.read_file(path)
+
+
+def setup_solve_condition(temp_dir: str):
+    qpc_reader = _import_qpc()[0]
+    conditions, macros = create_condition_corpus(random.Random(0))
+    block = qpc_reader.QPCBlockBase("bench.qpc").add_item("bench", [])
+    solve_condition = qpc_reader.solve_condition
+
+    def run():
+        for condition in conditions:
+            solve_condition(block, condition, macros)
+    return run
+
+
+def setup_replace_macros(temp_dir: str, macro_count: int):
+    qpc_project = _import_qpc()[1]
+    strings, macros = create_macro_corpus(random.Random(0), macro_count)
+    replace_macros = qpc_project.replace_macros
+
+    def run():
+        for string in strings:
+            replace_macros(string, macros)
+    return run
+
+
+def setup_to_string(temp_dir: str, shape: str):
+    qpc_reader = _import_qpc()[0]
+    path = create_lexer_corpus(os.path.join(temp_dir, "to_string"), random.Random(0))[shape]
+    block = qpc_reader.read_file(path)
+    return lambda: block.to_string()
+
+
+# caches that _get_includes fills, cleared before each call so every run does the same work
+INCLUDE_CACHE_NAMES = ("INCLUDE_DICT", "INCLUDE_DICT_DIR", "HEADER_PATHS", "INVALID_PATHS", "INCLUDE_LIST_DIR",
+                       "INCLUDE_DIRS_ABS", "EXCLUDE_DIRS", "FILE_CACHE", "RESOLVED_CACHE", "DIR_MTIMES",
+                       "SCANNED_FILES")
+
+
+def setup_get_includes(temp_dir: str):
+    qpc_c_parser = _import_qpc()[2]
+    paths, include_dirs = create_include_corpus(os.path.join(temp_dir, "includes"), random.Random(0))
+    # don't load the include cache in the hashes folder
+    qpc_c_parser.INCLUDE_CACHE_LOADED = True
+
+    def run():
+        for name in INCLUDE_CACHE_NAMES:
+            if hasattr(qpc_c_parser, name):
+                getattr(qpc_c_parser, name).clear()
+        for path in paths:
+            qpc_c_parser._get_includes(path, include_dirs)
+    return run
+
+
+BENCHMARKS = {
+    "lexer.flat": lambda temp_dir: setup_lexer(temp_dir, "flat"),
+    "lexer.nested": lambda temp_dir: setup_lexer(temp_dir, "nested"),
+    "lexer.conditions": lambda temp_dir: setup_lexer(temp_dir, "conditions"),
+    "lexer.comments": lambda temp_dir: setup_lexer(temp_dir, "comments"),
+    "lexer.quotes": lambda temp_dir: setup_lexer(temp_dir, "quotes"),
+    "solve_condition": setup_solve_condition,
+    "replace_macros.50": lambda temp_dir: setup_replace_macros(temp_dir, 50),
+    "replace_macros.1000": lambda temp_dir: setup_replace_macros(temp_dir, 1000),
+    "to_string.flat": lambda temp_dir: setup_to_string(temp_dir, "flat"),
+    "to_string.nested": lambda temp_dir: setup_to_string(temp_dir, "nested"),
+    "get_includes": setup_get_includes,
+}
+
+
+# ==================================================================================================
+# Running and Comparing
+# ==================================================================================================
+
+def measure(func, samples: int) -> dict:
+    func()  # warm up
+
+    # find how many calls make up one sample, like timeit's autorange
+    loops = 1
+    while True:
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        if perf_counter() - start >= SAMPLE_TIME:
+            break
+        loops *= 2
+
+    times = []
+    for _ in range(samples):
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((perf_counter() - start) / loops)
+
+    quartiles = statistics.quantiles(times, n=4) if len(times) > 1 else [times[0]] * 3
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "iqr": quartiles[2] - quartiles[0],
+        "loops": loops,
+        "samples": samples,
+    }
+
+
+def get_revision(qpc_dir: str) -> str:
+    try:
+        return subprocess.run(["git", "-C", qpc_dir, "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(names: list, samples: int, qpc_dir: str) -> dict:
+    sys.path.insert(0, qpc_dir)
+    results = {}
+    errors = {}
+    cwd = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix="qpc_microbench_") as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            for name in names:
+                try:
+                    func = BENCHMARKS[name](temp_dir)
+                except (ImportError, AttributeError) as F:
+                    # an older revision might not have this yet
+                    errors[name] = str(F)
+                    print(f"{name:<24} skipped: {F}")
+                    continue
+                results[name] = measure(func, samples)
+                result = results[name]
+                print(f"{name:<24} {result['median'] * 1000:>10.3f} ms  "
+                      f"min {result['min'] * 1000:>9.3f}  stdev {result['stdev'] / result['median']:>6.1%}")
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "revision": get_revision(qpc_dir),
+        "results": results,
+        "skipped": errors,
+    }
+
+
+# returns the benchmarks that got slower than the threshold, compared by median
+def compare_results(baseline: dict, current: dict, threshold: float) -> list:
+    regressions = []
+    print(f"\n{'Benchmark':<24} {'Baseline ms':>12} {'Current ms':>12} {'Change':>8}"
+          f"   ({baseline.get('revision') or 'baseline'} -> {current.get('revision') or 'current'})")
+    for name, result in current["results"].items():
+        base_result = baseline["results"].get(name)
+        if not base_result:
+            continue
+        change = result["median"] / base_result["median"] - 1
+        # not a regression if it's within the noise of either run
+        noise = max(result["iqr"] / result["median"], base_result["iqr"] / base_result["median"])
+        flag = ""
+        if change > max(threshold, noise):
+            flag = " !"
+            regressions.append(name)
+        print(f"{name:<24} {base_result['median'] * 1000:>12.3f} {result['median'] * 1000:>12.3f} "
+              f"{change:>+8.1%}{flag}")
+    return regressions
+
+
+def export_revision(revision: str, out_dir: str) -> None:
+    os.makedirs(out_dir)
+    archive = subprocess.run(["git", "-C", QPC_DIR, "archive", revision], capture_output=True, check=True)
+    subprocess.run(["tar", "-x", "-C", out_dir], input=archive.stdout, check=True)
+
+
+# runs this file in a new process for each revision, so the corpora and timing code are the same for both
+def run_revisions(revisions: list, names: list, samples: int) -> list:
+    results = []
+    with tempfile.TemporaryDirectory(prefix="qpc_revs_") as temp_dir:
+        for index, revision in enumerate(revisions):
+            rev_dir = os.path.join(temp_dir, f"rev_{index}")
+            out_path = os.path.join(temp_dir, f"rev_{index}.json")
+            export_revision(revision, rev_dir)
+            print(f"\n{revision}:")
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--qpc-dir", rev_dir, "--out", out_path,
+                            "--samples", str(samples), "--filter", *names], check=True)
+            with open(out_path, mode="r", encoding="utf-8") as out_file:
+                result = json.load(out_file)
+            result["revision"] = revision
+            results.append(result)
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Microbenchmarks for qpc")
+    arg_parser.add_argument("--filter", "-f", nargs="+", default=(), help="Only run benchmarks starting with these")
+    arg_parser.add_argument("--samples", "-s", type=int, default=7)
+    arg_parser.add_argument("--out", "-o", default="", help="Write results to this json file")
+    arg_parser.add_argument("--compare", "-c", default="", help="Compare against results from an older run")
+    arg_parser.add_argument("--revs", nargs=2, metavar=("BASE", "NEW"), help="Compare two git revisions of qpc")
+    arg_parser.add_argument("--threshold", type=float, default=0.05, help="Slowdown that counts as a regression")
+    arg_parser.add_argument("--qpc-dir", default=QPC_DIR, help=argparse.SUPPRESS)
+    parsed_args = arg_parser.parse_args()
+
+    names = [name for name in BENCHMARKS if not parsed_args.filter or name.startswith(tuple(parsed_args.filter))]
+
+    if parsed_args.revs:
+        baseline, results = run_revisions(parsed_args.revs, names, parsed_args.samples)
+    else:
+        baseline = None
+        results = run_benchmarks(names, parsed_args.samples, os.path.abspath(parsed_args.qpc_dir))
+
+    if parsed_args.out:
+        with open(parsed_args.out, mode="w", encoding="utf-8") as out_file:
+            json.dump(results, out_file, indent=1)
+
+    if parsed_args.compare:
+        with open(parsed_args.compare, mode="r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    if baseline and compare_results(baseline, results, parsed_args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,189 @@
+# creates a synthetic qpc tree for benchmarking, the same settings and seed always make the same tree
+# usage: python3 benchmarks/synthetic_tree.py OUT_DIR [--projects N] [--files M] ...
+
+import os
+import sys
+import json
+import random
+import argparse
+
+
+DEFAULT_SETTINGS = {
+    "projects": 50,  # project scripts
+    "files": 40,  # source files in each project, each also gets a header
+    "include_depth": 3,  # chain of qpc scripts each project script includes
+    "macros": 20,  # macros defined in the base file, used in conditions
+    "condition_density": 0.3,  # chance for an item in a project script to have a condition
+    "globs": 0.2,  # chance for a project to add its files with a glob instead of listing them
+    "groups": 5,  # groups the projects are split into, all of them are in an "everything" group
+    "dependency_fan_out": 3,  # how many earlier projects each project depends on at most
+    "seed": 0,
+}
+
+
+def _get_condition(rand: random.Random, settings: dict) -> str:
+    if rand.random() >= settings["condition_density"]:
+        return ""
+    macro = f"$MACRO_{rand.randrange(max(1, settings['macros']))}"
+    kind = rand.randrange(4)
+    if kind == 0:
+        return f" [{macro}]"
+    elif kind == 1:
+        return f" [!{macro} || $DEBUG]"
+    elif kind == 2:
+        return f" [{macro} && ($LINUX || $WINDOWS)]"
+    return f" [$RELEASE && !{macro}]"
+
+
+def _write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as file:
+        file.write(text)
+
+
+def _write_base_files(out_dir: str, settings: dict, project_names: list) -> None:
+    lines = ["// synthetic base file", ""]
+    lines += [f'macro MACRO_{i} "{i % 2}"' for i in range(settings["macros"])]
+    lines += ["", "configurations", "{", '    "Debug"', '    "Release"', "}", ""]
+    lines += ['include "_qpc_scripts/projects.qpc_base"', 'include "_qpc_scripts/groups.qpc_base"', ""]
+    _write(f"{out_dir}/_qpc_scripts/_default.qpc_base", "\n".join(lines))
+
+    lines = [f'project "{name}" "{name}/{name}.qpc"' for name in project_names]
+    _write(f"{out_dir}/_qpc_scripts/projects.qpc_base", "\n".join(lines) + "\n")
+
+    group_count = max(1, settings["groups"])
+    lines = []
+    for group in range(group_count):
+        lines += [f'group "group_{group}"', "{", f'    folder "Group {group}"', "    {"]
+        lines += [f'        "{name}"' for index, name in enumerate(project_names) if index % group_count == group]
+        lines += ["    }", "}"]
+    lines += ['group "everything"', "{"]
+    lines += [f'    contains "group_{group}"' for group in range(group_count)]
+    lines += ["}", ""]
+    _write(f"{out_dir}/_qpc_scripts/groups.qpc_base", "\n".join(lines))
+
+
+def _write_include_scripts(out_dir: str, settings: dict, rand: random.Random) -> None:
+    depth = settings["include_depth"]
+    for level in range(depth):
+        lines = [f"// include level {level}"]
+        if level + 1 < depth:
+            lines.append(f'include "$ROOT_DIR/_qpc_scripts/include_{level + 1}.qpc"')
+        lines += [
+            f'macro LEVEL_{level} "1"',
+            "configuration",
+            "{",
+            "    general",
+            "    {",
+            "        include_directories",
+            "        {",
+            '            "$ROOT_DIR/public"',
+            f'            "$ROOT_DIR/public/level_{level}"' + _get_condition(rand, settings),
+            "        }",
+            "    }",
+            "    compiler",
+            "    {",
+            "        preprocessor_definitions",
+            "        {",
+        ]
+        lines += [f'            "LEVEL_{level}_DEF_{i}"' + _get_condition(rand, settings) for i in range(8)]
+        lines += ["        }", "    }", "}", ""]
+        _write(f"{out_dir}/_qpc_scripts/include_{level}.qpc", "\n".join(lines))
+
+    lines = ["// shared public header", "#pragma once", ""]
+    _write(f"{out_dir}/public/common.h", "\n".join(lines))
+    for level in range(depth):
+        _write(f"{out_dir}/public/level_{level}/level.h", f'#pragma once\n#include "common.h"\n')
+
+
+def _write_project(out_dir: str, settings: dict, rand: random.Random, index: int, project_names: list) -> None:
+    name = project_names[index]
+    project_dir = f"{out_dir}/{name}"
+    file_count = settings["files"]
+
+    for i in range(file_count):
+        # headers include the previous header, so the include graph has some depth
+        header_includes = f'#include "{name}_{i - 1}.h"\n' if i else '#include "common.h"\n'
+        _write(f"{project_dir}/{name}_{i}.h", f"#pragma once\n{header_includes}int {name}_func_{i}();\n")
+        _write(f"{project_dir}/{name}_{i}.cpp", f'#include "{name}_{i}.h"\n#include <stdio.h>\n\n'
+                                                f"int {name}_func_{i}() {{ return {i}; }}\n")
+
+    lines = [f"// {name}"]
+    if settings["include_depth"]:
+        lines.append('include "$ROOT_DIR/_qpc_scripts/include_0.qpc"')
+    lines += [
+        f'macro PROJECT_INDEX "{index}"',
+        "",
+        "configuration",
+        "{",
+        "    general",
+        "    {",
+        '        configuration_type "static_library"' if index % 4 else '        configuration_type "dynamic_library"',
+        "    }",
+        "    compiler",
+        "    {",
+        "        preprocessor_definitions",
+        "        {",
+    ]
+    lines += [f'            "{name.upper()}_DEF_{i}"' + _get_condition(rand, settings) for i in range(6)]
+    lines += ["        }", "    }", "}", "", "files", "{", '    folder "Source Files"', "    {"]
+
+    if rand.random() < settings["globs"]:
+        lines.append('        "*.cpp"')
+    else:
+        for i in range(file_count):
+            condition = _get_condition(rand, settings)
+            if condition and i % 5 == 0:
+                # some files with their own compiler options
+                lines += [f'        "{name}_{i}.cpp"', "        {",
+                          f'            preprocessor_definitions {{ "FILE_{i}"{condition} }}', "        }"]
+            else:
+                lines.append(f'        "{name}_{i}.cpp"' + condition)
+
+    lines += ["    }", '    folder "Header Files"', "    {"]
+    lines += [f'        "{name}_{i}.h"' for i in range(file_count)]
+    lines += ["    }", "}", ""]
+
+    dependency_count = min(index, rand.randint(0, settings["dependency_fan_out"]))
+    if dependency_count:
+        lines += ["dependencies", "{"]
+        lines += [f'    "{project_names[dep]}"' for dep in sorted(rand.sample(range(index), dependency_count))]
+        lines += ["}", ""]
+
+    _write(f"{project_dir}/{name}.qpc", "\n".join(lines))
+
+
+def create_tree(out_dir: str, settings: dict = None) -> dict:
+    settings = {**DEFAULT_SETTINGS, **(settings or {})}
+    rand = random.Random(settings["seed"])
+    project_names = [f"project_{i}" for i in range(settings["projects"])]
+
+    _write_base_files(out_dir, settings, project_names)
+    _write_include_scripts(out_dir, settings, rand)
+    for index in range(len(project_names)):
+        _write_project(out_dir, settings, rand, index, project_names)
+
+    _write(f"{out_dir}/synthetic_tree.json", json.dumps(settings, indent=1))
+    return settings
+
+
+def add_settings_args(arg_parser: argparse.ArgumentParser) -> None:
+    for name, value in DEFAULT_SETTINGS.items():
+        arg_parser.add_argument("--" + name.replace("_", "-"), dest=name, type=type(value), default=value)
+
+
+def get_settings(parsed_args) -> dict:
+    return {name: getattr(parsed_args, name) for name in DEFAULT_SETTINGS}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Create a synthetic qpc tree")
+    arg_parser.add_argument("out_dir")
+    add_settings_args(arg_parser)
+    parsed_args = arg_parser.parse_args()
+    settings = create_tree(parsed_args.out_dir, get_settings(parsed_args))
+    print(f"Created {settings['projects']} projects in {parsed_args.out_dir}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import os
 import json
 
-from qpc_base import BaseProjectGenerator, Platform, create_directory
+from qpc_base import BaseProjectGenerator, Platform, create_directory, write_generated_file
 from qpc_project import ConfigType, Language, ProjectContainer, ProjectPass, Configuration
 from qpc_logging import warning, error, verbose, print_color, Color
 from ..shared import cmd_line_gen
@@ -30,8 +30,7 @@ class CompileCommandsGenerator(BaseProjectGenerator):
         for label, commands_list in self.commands_list.items():
             print_color(Color.CYAN, "Writing: " + f"compile_commands/{label}.json")
             compile_commands = json.dumps(commands_list, indent=4)
-            with open(f"compile_commands/{label}.json", "w") as file_io:
-                file_io.write(compile_commands)
+            write_generated_file(f"compile_commands/{label}.json", compile_commands)
     
     def create_project(self, project: ProjectContainer) -> None:
         project_passes = self._get_passes(project)
@@ -40,6 +39,8 @@ class CompileCommandsGenerator(BaseProjectGenerator):
 
         print_color(Color.CYAN, "Adding to Compile Commands: " + project.file_name)
         
+        # the command is the same for every file in passes with the same compiler and general settings
+        commands = {}
         for proj_pass in project_passes:
             self.cmd_gen.set_mode(proj_pass.config.general.compiler)
             label = f"{proj_pass.config_name.lower()}_{proj_pass.platform.name.lower()}_{proj_pass.arch.name.lower()}"
@@ -47,30 +48,33 @@ class CompileCommandsGenerator(BaseProjectGenerator):
                 self.all_files[label] = set()
             if label not in self.commands_list:
                 self.commands_list[label] = []
+            
+            config_key = project.get_config_key(proj_pass, "general", "compiler")
+            if config_key not in commands:
+                commands[config_key] = self.get_command(proj_pass)
                 
             for file in proj_pass.source_files:
                 if file not in self.all_files[label]:
                     self.all_files[label].add(file)
-                    self.commands_list[label].append(self.handle_file(file, proj_pass))
-            
-    def handle_file(self, file: str, project: ProjectPass) -> dict:
-        file_dict = {
-            "directory": os.getcwd().replace("\\", "/"),
-            "command": cmd_line_gen.get_compiler(project.config.general.compiler, project.config.general.language) + " ",
-            "file": file
-        }
+                    self.commands_list[label].append(self.handle_file(file, commands[config_key]))
+    
+    # everything in the command before the file
+    def get_command(self, project: ProjectPass) -> str:
+        command = cmd_line_gen.get_compiler(project.config.general.compiler, project.config.general.language) + " "
         
-        file_dict["command"] += " ".join(self.cmd_gen.convert_defines(project.config.compiler.preprocessor_definitions))
-        file_dict["command"] += " " + " ".join(self.cmd_gen.convert_includes(project.config.general.include_directories))
+        command += " ".join(self.cmd_gen.convert_defines(project.config.compiler.preprocessor_definitions))
+        command += " " + " ".join(self.cmd_gen.convert_includes(project.config.general.include_directories))
         
-        file_dict["command"] += " " + " ".join(project.config.compiler.options)
+        command += " " + " ".join(project.config.compiler.options)
         if f"{self.cmd_gen.switch}c" not in project.config.compiler.options:
-            file_dict["command"] += f" {self.cmd_gen.switch}c"
-            
-        file_dict["command"] += " " + file
-        
-        return file_dict
+            command += f" {self.cmd_gen.switch}c"
         
-        
-
-
+        return command
+            
+    @staticmethod
+    def handle_file(file: str, command: str) -> dict:
+        return {
+            "directory": os.getcwd().replace("\\", "/"),
+            "command": command + " " + file,
+            "file": file
+        }
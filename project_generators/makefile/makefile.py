@@ -5,7 +5,7 @@ from enum import Enum
 from qpc_args import args
 import qpc_hash
 from project_generators.shared.cmd_line_gen import get_compiler
-from qpc_base import BaseProjectGenerator, Platform, Arch, is_arch_64bit
+from qpc_base import BaseProjectGenerator, Platform, Arch, is_arch_64bit, write_generated_file
 from qpc_project import ConfigType, Language, ProjectContainer, ProjectPass, Configuration
 from qpc_parser import BaseInfo
 from qpc_logging import warning, error, verbose, print_color, Color
@@ -44,8 +44,7 @@ class MakefileGenerator(BaseProjectGenerator):
         for p in project_passes:
             makefile += gen_project_config_definitions(p)
         
-        with open(project.file_name + MAKEFILE_EXT, "w", encoding="utf-8") as f:
-            f.write(makefile)
+        write_generated_file(project.file_name + MAKEFILE_EXT, makefile)
 
     def does_project_exist(self, project_out_dir: str) -> bool:
         return os.path.isfile(os.path.splitext(project_out_dir)[0] + MAKEFILE_EXT)
@@ -84,8 +83,7 @@ all:
         for index, path in enumerate(make_paths):
             master_file += f"\tmake -C {path} -f {make_files[index]} $(SETTINGS)\n"
 
-        with open(master_file_path, "w") as master_file_w:
-            master_file_w.write(master_file + "\n")
+        write_generated_file(master_file_path, master_file + "\n")
     
     def does_master_file_exist(self, master_file_path: str) -> bool:
         return True
@@ -208,11 +206,12 @@ def gen_project_targets(conf) -> str:
 def gen_dependency_tree(objects, headers, conf: Configuration) -> str:
     makefile = "\n#DEPENDENCY TREE:\n\n"
     pic = "-fPIC"
+    cflags = gen_cflags(conf)
         
     for obj, path in objects.items():
         makefile += f"\n{obj}: {path}\n"
         makefile += f"\t@echo '$(CYAN)Building Object {path}$(NC)'\n"
-        makefile += f"\t@$(COMPILER) -c {pic} {gen_cflags(conf)} {path} -o $@\n"
+        makefile += f"\t@$(COMPILER) -c {pic} {cflags} {path} -o $@\n"
 
     return makefile
 
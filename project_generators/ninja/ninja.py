@@ -1,8 +1,10 @@
 import sys
 import os
+import qpc_base
 
-from qpc_base import BaseProjectGenerator, Platform, create_directory
-from qpc_project import ConfigType, Language, ProjectContainer, ProjectPass, Configuration, General, SourceFileCompile
+from qpc_base import BaseProjectGenerator, Platform, create_directory, write_generated_file
+from qpc_project import ConfigType, Language, ProjectContainer, ProjectPass, Configuration, General, SourceFileCompile, \
+    EMPTY_SOURCE_FILE_COMPILE
 from qpc_parser import BaseInfo
 from qpc_logging import warning, error, verbose, print_color, Color, verbose_color
 from ..shared.cmd_line_gen import get_compiler, Mode
@@ -46,8 +48,7 @@ class NinjaGenerator(BaseProjectGenerator):
                         commands_list[commands_list.index(command)] = "\n".join(new_command)
             
             script += '\n\n'.join(commands_list)
-            with open(f"build_ninja/{label}.ninja", "w") as file_io:
-                file_io.write(script)
+            write_generated_file(f"build_ninja/{label}.ninja", script)
     
     def get_dependencies(self, label: str, dep_list: list) -> list:
         output_list = []
@@ -68,6 +69,8 @@ class NinjaGenerator(BaseProjectGenerator):
         if project.dependencies:
             self.dependencies[project.project_path] = project.dependencies.copy()
         
+        # files without their own options have the same flags in passes with the same compiler and general settings
+        cflags = {}
         for proj_pass in project_passes:
             conf = proj_pass.config
             self.cmd_gen.set_mode(proj_pass.config.general.compiler)
@@ -85,8 +88,15 @@ class NinjaGenerator(BaseProjectGenerator):
             
             self.commands_list[label].append(self.gen_header(conf, project, compiler, proj_name))
             
+            config_key = project.get_config_key(proj_pass, "general", "compiler")
             for file, file_compile in proj_pass.source_files.items():
-                self.commands_list[label].append(self.handle_file(file, file_compile.compiler, proj_pass, proj_name))
+                if file_compile.compiler is EMPTY_SOURCE_FILE_COMPILE:
+                    if config_key not in cflags:
+                        cflags[config_key] = self.get_cflags(proj_pass, file_compile.compiler)
+                    file_cflags = cflags[config_key]
+                else:
+                    file_cflags = self.get_cflags(proj_pass, file_compile.compiler)
+                self.commands_list[label].append(self.handle_file(file, file_cflags, proj_pass, proj_name))
             
             output_file = self.handle_target(proj_pass, proj_name, proj_pass.source_files)
             self.commands_list[label].append(output_file)
@@ -145,13 +155,13 @@ rule so_msvc
 {proj_name}_src_dir = {os.getcwd()}
 out_file = {outname}
 {proj_name}_compiler = {compiler}
-{proj_name}_build_dir = {os.path.abspath(conf.general.build_dir)}
+{proj_name}_build_dir = {qpc_base.abs_path(conf.general.build_dir)}
 
 build ${proj_name}_build_dir: mkdir ${proj_name}_build_dir
 """
     
     def get_file_build_path(self, proj_name: str, general: General, file: str):
-        return os.path.abspath(self.cmd_gen.get_file_build_path(general, file)).replace(':', '$:')
+        return qpc_base.abs_path(self.cmd_gen.get_file_build_path(general, file)).replace(':', '$:')
         # return f"${proj_name}_src_dir/{self.cmd_gen.get_file_build_path(general, file)}"
     
     @staticmethod
@@ -185,12 +195,15 @@ build ${proj_name}_build_dir: mkdir ${proj_name}_build_dir
 
         return f"{build}\n    cflags = {link_flags} {libs}\n"
 
+    def get_cflags(self, proj: ProjectPass, file_compile: SourceFileCompile) -> str:
+        return add_escapes(self.cmd_gen.file_compile_flags(proj.config, file_compile))
+
     # Build definition for file
-    def handle_file(self, file: str, file_compile: SourceFileCompile, proj: ProjectPass, proj_name: str) -> str:
+    def handle_file(self, file: str, cflags: str, proj: ProjectPass, proj_name: str) -> str:
         # print(os.getcwd(), project)
         build_path = self.get_file_build_path(proj_name, proj.config.general, file)
         cmd = f"build {build_path}: cc_{self.cmd_gen.mode.name.lower()} {abs_path(file)}\n"
-        cmd += f"    cflags = {add_escapes(self.cmd_gen.file_compile_flags(proj.config, file_compile))}\n"
+        cmd += f"    cflags = {cflags}\n"
         cmd += f"    compiler = ${proj_name}_compiler\n"
         return cmd
     
@@ -200,5 +213,5 @@ def add_escapes(string: str) -> str:
 
 
 def abs_path(path: str) -> str:
-    return add_escapes(os.path.abspath(path))
+    return add_escapes(qpc_base.abs_path(path))
 
@@ -3,6 +3,7 @@ from enum import Enum, auto
 from qpc_project import (Language, Configuration, Compile, Linker, General,
                          SourceFile, SourceFileCompile, ProjectPass, PrecompiledHeader)
 from qpc_logging import warning
+from qpc_base import abs_path
 from ..shared import msvc_tools
 
 
@@ -109,7 +110,7 @@ class CommandLineGen:
                 
     def convert_includes(self, include_paths: list) -> list:
         converted_paths = []
-        [converted_paths.append(f"{self._char_inc_dir}\"{os.path.abspath(path)}\"") for path in include_paths]
+        [converted_paths.append(f"{self._char_inc_dir}\"{abs_path(path)}\"") for path in include_paths]
         return converted_paths
     
     @staticmethod
@@ -121,7 +122,7 @@ class CommandLineGen:
     @staticmethod
     def convert_char_abs(char: str, items: list) -> list:
         converted_paths = []
-        [converted_paths.append(f"{char}\"{os.path.abspath(item)}\"") for item in items]
+        [converted_paths.append(f"{char}\"{abs_path(item)}\"") for item in items]
         return converted_paths
     
     @staticmethod
@@ -156,7 +157,7 @@ class CommandLineGen:
             return ""
         
         if self.mode == Mode.MSVC:
-            return f"/IMPLIB:\"{os.path.abspath(os.path.splitext(lib)[0])}.lib\""
+            return f"/IMPLIB:\"{abs_path(os.path.splitext(lib)[0])}.lib\""
         
         # does clang or gcc have an import library option?
         
@@ -218,7 +219,7 @@ class CommandLineGen:
             return ""
     
         if self.mode == Mode.MSVC:
-            return f"/Fp\"{os.path.abspath(os.path.splitext(path)[0])}.pch\""
+            return f"/Fp\"{abs_path(os.path.splitext(path)[0])}.pch\""
     
         return ""
         
@@ -3,9 +3,9 @@ import os
 import sys
 import qpc_hash
 import lxml.etree as et
-from time import perf_counter
+import qpc_trace
 from qpc_args import args
-from qpc_base import BaseProjectGenerator, Platform, Arch
+from qpc_base import BaseProjectGenerator, Platform, Arch, add_generated_file, write_generated_file
 from qpc_project import (PrecompiledHeader, ConfigType, Language, Standard,
                          ProjectContainer, ProjectPass, Compile, SourceFileCompile)
 from qpc_parser import BaseInfo
@@ -14,10 +14,6 @@ from enum import Enum
 from typing import List, Dict
 
 
-def timer_diff(start_time: float) -> str:
-    return str(round(perf_counter() - start_time, 4))
-
-
 class VisualStudioGenerator(BaseProjectGenerator):
     def __init__(self):
         super().__init__("Visual Studio")
@@ -43,41 +39,23 @@ class VisualStudioGenerator(BaseProjectGenerator):
         
         out_dir = project.get_out_dir()
 
-        if args.time:
-            start_time = perf_counter()
-        else:
-            print_color(Color.CYAN, "Creating: " + project.file_name + ".vcxproj")
-
-        vcx_project, source_files, include_list, res_list, none_list = create_vcxproj(project, project_passes)
-        write_project(project, out_dir, vcx_project, ".vcxproj")
+        print_color(Color.CYAN, "Creating: " + project.file_name + ".vcxproj")
+        with qpc_trace.span("create vcxproj", {"project": project.file_name}):
+            vcx_project, source_files, include_list, res_list, none_list = create_vcxproj(project, project_passes)
+            write_project(project, out_dir, vcx_project, ".vcxproj")
         
-        if args.time:
-            print_color(Color.CYAN, timer_diff(start_time) + " - Created: " + project.file_name + ".vcxproj")
-        
-        if args.time:
-            start_time = perf_counter()
-        else:
-            print_color(Color.CYAN, "Creating: " + project.file_name + ".vcxproj.filters")
-            
-        vcxproject_filters = create_vcxproj_filters(project, source_files, include_list, res_list, none_list)
-        write_project(project, out_dir, vcxproject_filters, ".vcxproj.filters")
-
-        if args.time:
-            print_color(Color.CYAN, timer_diff(start_time) + " - Created: " + project.file_name + ".vcxproj.filters")
+        print_color(Color.CYAN, "Creating: " + project.file_name + ".vcxproj.filters")
+        with qpc_trace.span("create vcxproj.filters", {"project": project.file_name}):
+            vcxproject_filters = create_vcxproj_filters(project, source_files, include_list, res_list, none_list)
+            write_project(project, out_dir, vcxproject_filters, ".vcxproj.filters")
         
         if not self.has_debug_commands(project_passes):
             return
         
-        if args.time:
-            start_time = perf_counter()
-        else:
-            print_color(Color.CYAN, "Creating: " + project.file_name + ".vcxproj.user")
-            
-        vcxproject_user = create_vcxproj_user(project, project_passes)
-        write_project(project, out_dir, vcxproject_user, ".vcxproj.user")
-
-        if args.time:
-            print_color(Color.CYAN, timer_diff(start_time) + " - Created: " + project.file_name + ".vcxproj.user")
+        print_color(Color.CYAN, "Creating: " + project.file_name + ".vcxproj.user")
+        with qpc_trace.span("create vcxproj.user", {"project": project.file_name}):
+            vcxproject_user = create_vcxproj_user(project, project_passes)
+            write_project(project, out_dir, vcxproject_user, ".vcxproj.user")
         
         # return out_dir
         
@@ -192,6 +170,8 @@ class VisualStudioGenerator(BaseProjectGenerator):
         
             sln_write_section(self.solution_file, "NestedProjects", global_folder_uuid_dict, False)
             self.solution_file.write("EndGlobal\n")
+            
+        add_generated_file(master_file_path)
 
     def sln_project_def_loop(self, project_def, info, info_win):
         for folder_list in info_win.project_folders.values():
@@ -271,27 +251,17 @@ def create_vcxproj(project_list: ProjectContainer, project_passes: list):
     # --------------------------------------------------------------------
     # Now, add the files
     
-    all_sources = {}
-    all_includes = {}
-    all_resources = {}
-    all_none_files = {}
-    
     header_exts = {".h", ".hxx", ".hpp"}
     none_exts = {".rc", ".h", ".hxx", ".hpp"}
     
     # gather all files
-    for project in project_passes:
-        source_files = get_project_files(project.source_files)[0]
-        all_sources = {**all_sources, **source_files}
-        
-        include_list, remaining_files = get_project_files(project.files, header_exts)
-        all_includes = {**all_includes, **include_list}
-        
-        res_list, remaining_files = get_project_files(remaining_files, {".rc"})
-        all_resources = {**all_resources, **res_list}
-        
-        none_list = get_project_files(remaining_files, invalid_exts=none_exts)[0]
-        all_none_files = {**all_none_files, **none_list}
+    file_table = project_list.file_table
+    file_mask = project_list.get_any_pass_mask(project_passes, False)
+    
+    all_sources = get_merged_files(project_passes, project_list.get_any_pass_mask(project_passes, True), True)
+    all_includes = get_merged_files(project_passes, file_mask & file_table.get_ext_mask(header_exts), False)
+    all_resources = get_merged_files(project_passes, file_mask & file_table.get_ext_mask({".rc"}), False)
+    all_none_files = get_merged_files(project_passes, file_mask & ~file_table.get_ext_mask(none_exts), False)
         
     # now add files
     create_file_item_groups(project_passes, vcxproj, all_sources, "ClCompile")
@@ -893,15 +863,30 @@ def create_file_item_groups(passes: List[ProjectPass], parent_elem: et.Element,
     if not file_dict:
         return
     
+    source = file_type == "ClCompile"
+    container = passes[0].container
+    file_mask = container.file_table.get_mask(file_dict)
+    # only files missing from a pass need to be checked for each pass, unless it has per file compiler options
+    partial_files = set(container.file_table.get_paths(
+        file_mask & ~container.get_all_passes_mask(passes, source)))
+    pass_masks = [container.get_pass_mask(project, source) for project in passes]
+    
     item_group = et.SubElement(parent_elem, "ItemGroup")
     for file_path in file_dict:
         elem_file = et.SubElement(item_group, file_type)
         elem_file.set("Include", file_path)
-
-        for project in passes:
-            project_files = project.source_files if file_type == "ClCompile" else project.files
+        
+        if not source and file_path not in partial_files:
+            continue
+        
+        # a file in every pass with the same options in each only needs them added once, without a condition
+        if source and file_path not in partial_files and add_shared_compiler_options(elem_file, passes, file_path):
+            continue
+        
+        index = container.file_table.get_index(file_path)
+        for project, pass_mask in zip(passes, pass_masks):
             condition = make_conf_plat_cond(project.config_name, project.arch)
-            if file_path not in project_files:
+            if not pass_mask >> index & 1:
                 exclude_elem = et.SubElement(elem_file, "ExcludedFromBuild")
                 exclude_elem.text = "true"
                 exclude_elem.set("Condition", condition)
@@ -934,6 +919,25 @@ def create_file_item_groups(passes: List[ProjectPass], parent_elem: et.Element,
                     del elem_list[0].attrib["Condition"]
                 
                 
+# returns False if the options are different between passes, or if they can't be merged like below
+def add_shared_compiler_options(elem_file: et.Element, passes: List[ProjectPass], file_path: str) -> bool:
+    compilers = [project.source_files[file_path].compiler for project in passes]
+    if any(compiler is not compilers[0] for compiler in compilers):
+        container = passes[0].container
+        compiler_key = container.get_value_key(compilers[0])
+        if any(container.get_value_key(compiler) != compiler_key for compiler in compilers[1:]):
+            return False
+    
+    add_compiler_options(elem_file, compilers[0])
+    tags = [elem.tag for elem in elem_file]
+    if len(tags) != len(set(tags)):
+        # more than one of the same option, which are left with a condition for each pass, even with only one pass
+        for elem in list(elem_file):
+            elem_file.remove(elem)
+        return False
+    return True
+
+
 def item_group_compiler_options(elem_file: et.Element, project: ProjectPass, file_path: str):
     prev_elements = [element for element in elem_file]
     add_compiler_options(elem_file, project.source_files[file_path].compiler)
@@ -944,26 +948,24 @@ def item_group_compiler_options(elem_file: et.Element, project: ProjectPass, fil
         element.set("Condition", condition)
 
 
-# TODO: maybe move this to the project class and rename to get_files_by_ext?
-def get_project_files(project_files, valid_exts=None, invalid_exts=None):
-    if not valid_exts:
-        valid_exts = ()
-    if not invalid_exts:
-        invalid_exts = ()
-    
-    # now get only add any file that has any of the valid file extensions and none of the invalid ones
-    wanted_files = {}
-    unwanted_files = {}
-    for file_path, folder_path in project_files.items():
-        if file_path not in wanted_files:
-            file_ext = os.path.splitext(file_path)[1].casefold()
-            if file_ext not in invalid_exts:
-                if valid_exts and file_ext not in valid_exts:
-                    unwanted_files[file_path] = folder_path
-                else:
-                    wanted_files[file_path] = folder_path
-    
-    return wanted_files, unwanted_files
+# merges the files of each pass in the mask, each file gets the value from the last pass that has it
+def get_merged_files(passes: List[ProjectPass], mask: int, source: bool) -> dict:
+    if not passes or not mask:
+        return {}
+    container = passes[0].container
+    merged_files = {}
+    # in the order of the pass dicts, not the file table, a pass can remove a file and add it again at the end
+    for project in passes:
+        project_files = project.source_files if source else project.files
+        project_mask = container.get_pass_mask(project, source)
+        pass_mask = mask & project_mask
+        if pass_mask == project_mask:
+            merged_files.update(project_files)
+        elif pass_mask:
+            wanted_files = set(container.file_table.get_paths(pass_mask))
+            merged_files.update({file_path: value for file_path, value in project_files.items()
+                                 if file_path in wanted_files})
+    return merged_files
 
 
 def create_vcxproj_filters(project_list: ProjectContainer, source_files: Dict[str, SourceFileCompile],
@@ -1032,8 +1034,7 @@ def write_project(project: ProjectContainer, out_dir: str, xml_file: et.Element,
     # directory = os.path.split(file_path)
     create_directory(out_dir)
     
-    with open(file_path, "w", encoding="utf-8") as project_file:
-        project_file.write(xml_to_string(xml_file))
+    write_generated_file(file_path, xml_to_string(xml_file))
 
 
 def xml_to_string(elem) -> str:
@@ -6,7 +6,9 @@
 import os
 import sys
 
-from time import perf_counter
+import qpc_profile
+qpc_profile.start()
+
 from enum import Enum
 
 import qpc_reader
@@ -15,8 +17,15 @@ from qpc_parser import Parser, ProjectDefinition
 from qpc_args import args, parse_args
 from qpc_base import BaseProjectGenerator, create_directory, Platform, Arch
 import qpc_logging
+from qpc_logging import verbose
 
 import qpc_hash
+import qpc_c_parser
+import qpc_query
+import qpc_trace
+import qpc_memory
+
+qpc_profile.end_phase()
 
 
 PRINT_LINE = "------------------------------------------------------------------------"
@@ -104,6 +113,12 @@ def should_call_create_master_file(file_path: str, info, generator: BaseProjectG
     return False
 
 
+def create_project(generator: BaseProjectGenerator, project) -> None:
+    qpc_trace.COUNTERS["create_project"] += 1
+    with qpc_trace.span("create_project", {"generator": generator.filename, "project": project.project_path}):
+        generator.create_project(project)
+
+
 def main():
     create_directory(qpc_hash.QPC_HASH_DIR)
     os.chdir(args.root_dir)
@@ -112,12 +127,11 @@ def main():
     
     info = parser.parse_base_info(args.base_file)
     generator_list = get_generators_all()
-    
-    if args.time:
-        start_time = perf_counter()
+    qpc_memory.end_phase("base parse")
     
     for project_def in info.projects:
         project_script = project_def.path
+        qpc_logging.flush()
         
         valid_generators = get_generators(project_def.platforms, generator_list)
 
@@ -127,44 +141,71 @@ def main():
         if not args.skip_projects:
             print()
 
-        generators_rebuild = get_generator_need_rebuild(project_script, valid_generators)
-        if generators_rebuild or should_build_project(project_script, valid_generators):
-            rebuild_info = qpc_hash.get_rebuild_info(project_script, generators_rebuild)
-
-            project_dir, project_filename = os.path.split(project_script)
-
-            if project_dir and project_dir != args.root_dir:
-                os.chdir(project_dir)
-
-            project = parser.parse_project(project_def, project_script, info, valid_generators)
-            if not project:
-                continue
-
-            if args.force or rebuild_info["rebuild_all"]:
-                [generator.create_project(project) for generator in valid_generators]
+        with qpc_trace.span("project", {"path": project_script}), qpc_memory.track_project(project_script):
+            with qpc_trace.span("hash check"):
+                generators_rebuild = get_generator_need_rebuild(project_script, valid_generators)
+                build_project = generators_rebuild or should_build_project(project_script, valid_generators)
+
+            if build_project:
+                rebuild_info = qpc_hash.get_rebuild_info(project_script, generators_rebuild)
+
+                project_dir, project_filename = os.path.split(project_script)
+
+                if project_dir and project_dir != args.root_dir:
+                    os.chdir(project_dir)
+
+                project = parser.parse_project(project_def, project_script, info, valid_generators)
+                if not project:
+                    continue
+                qpc_trace.COUNTERS["projects.parsed"] += 1
+
+                # only worked out if the scripts changed, otherwise the ones from the last run are still right
+                # not saved with --force, since the scripts might have changed since then
+                generator_hashes = None
+
+                if args.force:
+                    [create_project(generator, project) for generator in valid_generators]
+                elif rebuild_info["rebuild_all"]:
+                    # the scripts changed, but what they resolve to might not have
+                    generator_hashes = qpc_hash.get_generator_hashes(project, valid_generators)
+                    for generator in valid_generators:
+                        if generator in generators_rebuild or \
+                                not qpc_hash.check_generator_hash(project_script, generator, generator_hashes):
+                            create_project(generator, project)
+                        else:
+                            qpc_trace.COUNTERS["create_project.unchanged"] += 1
+                            verbose(lambda: f"Unchanged: {project_filename} - {generator.filename}")
+                else:
+                    generator_hashes = rebuild_info["generator_hashes"]
+                    # does any generator need to rebuild?
+                    for generator in generators_rebuild:
+                        if generator_needs_rebuild(project_filename, generator, rebuild_info):
+                            create_project(generator, project)
+
+                if project_dir and project_dir != args.root_dir:
+                    os.chdir(args.root_dir)
+
+                info.add_project_dependencies(project_script, project.dependencies)
+                with qpc_trace.span("write hash"):
+                    qpc_hash.write_project_hash(project_script, project, valid_generators, generator_hashes)
+                
             else:
-                # does any generator need to rebuild?
-                for generator in generators_rebuild:
-                    if generator_needs_rebuild(project_filename, generator, rebuild_info):
-                        generator.create_project(project)
-
-            if project_dir and project_dir != args.root_dir:
-                os.chdir(args.root_dir)
-
-            info.add_project_dependencies(project_script, project.dependencies)
-            qpc_hash.write_project_hash(project_script, project, valid_generators)
-            
-        else:
-            info.add_project_dependencies(project_script, qpc_hash.get_project_dependencies(project_script))
+                qpc_trace.COUNTERS["projects.valid"] += 1
+                info.add_project_dependencies(project_script, qpc_hash.get_project_dependencies(project_script))
             
         info.project_hashes[project_script] = qpc_hash.get_hash_file_path(project_script)
 
+    qpc_hash.write_dependency_graph(info.project_dependencies)
+    qpc_memory.end_phase("projects")
+
     if args.time:
         print("\nFinished Parsing Projects"
-              "\n\tTime: " + str(round(perf_counter() - start_time, 4)) +
               "\n\tParse Count: " + str(parser.counter))
 
-    [generator.projects_finished() for generator in generator_list]
+    for generator in generator_list:
+        with qpc_trace.span("projects_finished", {"generator": generator.filename}):
+            generator.projects_finished()
+    qpc_memory.end_phase("projects finished")
 
     if args.master_file:
         print(PRINT_LINE)
@@ -176,23 +217,76 @@ def main():
             generator_platforms = set()
             [generator_platforms.add(platform) for platform in generator.get_supported_platforms()]
             project_hashes = info.get_hashes(*generator_platforms)
-            
-            if should_call_create_master_file(file_path, info, generator, project_hashes):
-                generator.create_master_file(info, file_path)
-                qpc_hash.write_master_file_hash(file_path, info, generator.get_supported_platforms(), generator.path)
+
+            with qpc_trace.span("master file", {"generator": generator.filename, "path": file_path}):
+                if should_call_create_master_file(file_path, info, generator, project_hashes):
+                    generator.create_master_file(info, file_path)
+                    qpc_hash.write_master_file_hash(file_path, info, generator.get_supported_platforms(), generator.path)
+        qpc_memory.end_phase("master files")
 
 
 if __name__ == "__main__":
+    # doing this so we only allow valid generator options
+    with qpc_profile.phase("generator discovery"):
+        GENERATOR_HANDLER = GeneratorHandler()
+    with qpc_profile.phase("argument parsing"):
+        parse_args(GENERATOR_HANDLER.get_generator_args())
+        qpc_logging.post_args_init()
+    with qpc_profile.phase("generator loading"):
+        GENERATOR_HANDLER.post_args_init()
+    with qpc_profile.phase("generator hashing"):
+        qpc_hash.post_args_init()
+
+    # stderr when querying, since only json goes to stdout then
+    qpc_profile.print_startup_report(args.profile_startup, sys.stderr if args.query else sys.stdout)
+
+    if args.trace or args.time or args.report:
+        qpc_trace.enable()
+    if args.report:
+        qpc_trace.count_file_system_calls()
+    if args.profile_memory is not None:
+        qpc_memory.enable()
+
+    if args.query:
+        # only json goes to stdout here
+        os.chdir(args.root_dir)
+        with qpc_trace.span("query"):
+            qpc_query.run_query(get_generators_all(), args.query)
+        if args.trace:
+            qpc_trace.write_trace(args.trace)
+        sys.exit(0)
+
     # TODO: maybe print more info here if verbose?
     print(PRINT_LINE + "\n"
           " Quiver Project Creator\n " + ' '.join(sys.argv[1:]) +
           "\n" + PRINT_LINE)
+    
+    os.chdir(args.root_dir)
+    with qpc_trace.span("run"):
+        with qpc_trace.span("run hash check"):
+            skip_run = qpc_hash.check_run_hash()
 
-    # doing this so we only allow valid generator options
-    GENERATOR_HANDLER = GeneratorHandler()
-    parse_args(GENERATOR_HANDLER.get_generator_args())
-    GENERATOR_HANDLER.post_args_init()
-    qpc_hash.post_args_init()
-    main()
+        if skip_run:
+            qpc_trace.COUNTERS["run.skipped"] += 1
+            print("Nothing changed since the last run")
+        else:
+            main()
+            with qpc_trace.span("write run hash"):
+                qpc_hash.write_run_hash()
+                qpc_c_parser.save_include_cache()
+
+    if args.time:
+        print(PRINT_LINE)
+        qpc_trace.print_span_totals()
+    if args.trace:
+        qpc_trace.write_trace(args.trace)
+        print("Wrote trace: " + args.trace)
+    if args.report:
+        qpc_trace.write_report(args.report, qpc_hash._get_run_hash_args())
+        print("Wrote report: " + args.report)
+    if args.profile_memory is not None:
+        print(PRINT_LINE)
+        qpc_memory.print_memory_report(args.profile_memory)
     
+    qpc_logging.print_repeated_warnings()
     print(f"{PRINT_LINE}\nFinished - {qpc_logging.WARNING_COUNT} Warnings\n{PRINT_LINE}")
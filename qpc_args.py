@@ -30,13 +30,23 @@ def parse_args(generators: list) -> None:
     # cmd_parser.add_argument("--projectdir", action="store_true",
     #                         help="Output container files based on PROJECT_DIR macro, relative to root dir probably")
 
-    cmd_parser.add_argument("--time", "-t", action="store_true", help="Print the time taken to parse")
+    cmd_parser.add_argument("--time", "-t", action="store_true", help="Print the time spent on each part of the run")
+    cmd_parser.add_argument("--trace", dest="trace", default="",
+                            help="Write a chrome trace of the run to this file, for chrome://tracing or ui.perfetto.dev")
+    cmd_parser.add_argument("--report", dest="report", default="",
+                            help="Write counters of hot operations and timings of the run to this json file")
     cmd_parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose console output")
+    cmd_parser.add_argument("--log-json", dest="log_json", default="",
+                            help="Also write warnings, errors and verbose output to this file as json lines")
     cmd_parser.add_argument("--force", "-f", action="store_true", help="Force recreate all projects")
     cmd_parser.add_argument("--force_master", "-fm", action="store_true", help="Force recreate master file")
     cmd_parser.add_argument("--hidewarnings", "-w", dest="hide_warnings", action="store_true", help="Suppress all warnings")
+    cmd_parser.add_argument("--hide-repeated-warnings", "-hrw", dest="hide_repeated_warnings", action="store_true",
+                            help="Only print a warning the first time, like the same line of a script in each config")
     cmd_parser.add_argument("--checkfiles", "-cf", dest="check_files", action="store_true", help="Check if any added file exists")
     cmd_parser.add_argument("--skipprojects", "-sp", dest="skip_projects", action="store_true", help="Don't generate projects")
+    cmd_parser.add_argument("--trust-stat", "-ts", dest="trust_stat", action="store_true",
+                            help="Trust file modification times and sizes when checking if anything changed since the last run")
 
     cmd_parser.add_argument("--configs", "-c", nargs="+", default=(), help="Select configurations, added to configs set in base files")
     cmd_parser.add_argument("--platforms", "-p", nargs="+", default=(get_default_platform(),), choices=platforms,
@@ -48,14 +58,23 @@ def parse_args(generators: list) -> None:
     cmd_parser.add_argument("--remove", "-r", default=(), nargs="+", help="Remove projects or groups from generating")
     cmd_parser.add_argument("--macros", "-m", nargs="+", default=(), help="Macros to define and set to '1' in projects")
 
-    # TODO: figure out how vpc handles these and recreate it here
-    #  might come waaay later since it"s very low priority
-    # cmd_parser.add_argument("-at", "--add_tree", nargs="+", help="Add a project and all projects that depend on it")
-    # cmd_parser.add_argument("-ad", "--add_depend", nargs="+", help="Add a project and all projects that it depends on")
+    # uses the dependencies from the last time each project was parsed
+    cmd_parser.add_argument("--add_tree", "-at", nargs="+", default=(), help="Add a project and all projects that depend on it")
+    cmd_parser.add_argument("--add_depend", "-ad", nargs="+", default=(), help="Add a project and all projects that it depends on")
+    # TODO: figure out how vpc handles this and recreate it here
     # Use /h spew final target build set only (no .vcproj created). - what?
 
     cmd_parser.add_argument("--masterfile", "-mf", dest="master_file",
                             help='Create a master file for building all projects with')
+    cmd_parser.add_argument("--profile-startup", dest="profile_startup", nargs="?", default=None, const="",
+                            help="Print the time and memory used by each startup phase and import, "
+                                 "and write them as json to a file if one is given")
+    cmd_parser.add_argument("--profile-memory", dest="profile_memory", nargs="?", default=None, const="",
+                            help="Print the memory each phase of the run allocated, where it was allocated, and how "
+                                 "much each project kept, and write it as json to a file if one is given")
+    cmd_parser.add_argument("--query", "-q", nargs="+", default=(),
+                            help="Print the projects and configs that changing these files would rebuild as json, "
+                                 "doesn't generate anything")
 
     global args
     args.__dict__.update(cmd_parser.parse_args().__dict__)
@@ -69,6 +88,23 @@ def parse_args(generators: list) -> None:
     args.out_dir = os.path.normpath(args.out_dir) if os.path.isabs(args.out_dir) else \
         os.path.normpath(args.root_dir + os.sep + args.out_dir)
 
+    if args.trace:
+        args.trace = os.path.normpath(os.path.abspath(args.trace))
+
+    if args.log_json:
+        args.log_json = os.path.normpath(os.path.abspath(args.log_json))
+
+    if args.report:
+        args.report = os.path.normpath(os.path.abspath(args.report))
+
+    if args.profile_startup:
+        args.profile_startup = os.path.normpath(os.path.abspath(args.profile_startup))
+
+    if args.profile_memory:
+        args.profile_memory = os.path.normpath(os.path.abspath(args.profile_memory))
+
+    args.query = [os.path.normpath(os.path.abspath(path)).replace("\\", "/") for path in args.query]
+
     args.platforms = _convert_to_enum(args.platforms, Platform)
     args.archs = _convert_to_enum(args.archs, Arch)
 
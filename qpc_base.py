@@ -1,18 +1,16 @@
 import sys
 import os
+import glob
 from platform import machine
 from enum import Enum, auto, EnumMeta
-from time import perf_counter
+import qpc_trace
 
 global args
 
 
 QPC_DIR = os.path.dirname(os.path.realpath(__file__)).replace("\\", "/") + "/"
 QPC_GENERATOR_DIR = QPC_DIR + "project_generators"
-
-
-def timer_diff(start_time: float) -> str:
-    return str(round(perf_counter() - start_time, 4))
+QPC_HASH_DIR = QPC_DIR + "hashes/"
 
 
 # header files like c/c++ would really be nice right about now
@@ -57,7 +55,7 @@ class BaseProjectGenerator:
         self._uses_master_file = False
         self._macro = ""
         
-        self._start_time = None
+        self._span = None
         self._current_build = None
         
     # use this for anything that needs to be set after arguments are parsed/initialized
@@ -69,15 +67,13 @@ class BaseProjectGenerator:
         pass
     
     def _print_creating(self, output_name: str):
-        if args.time:
-            self._start_time = perf_counter()
-        else:
-            print("Creating: " + output_name)
+        print("Creating: " + output_name)
         self._current_build = output_name
+        self._span = qpc_trace.begin_span("create " + output_name)
     
     def _print_finished(self):
-        if args.time and self._current_build:
-            print(timer_diff(self._start_time) + " - Created: " + self._current_build)
+        qpc_trace.end_span(self._span)
+        self._span = None
         self._current_build = None
         
     # ProjectContainer from qpc_project.py
@@ -191,8 +187,39 @@ def posix_path(string: str) -> str:
     return string.replace("\\", "/")
 
 
+# the same paths get normalized over and over in a run, so each one is only normalized once
+# absolute paths depend on the working directory, so those are kept for each directory they were made in
+
+_NORM_PATHS = {}  # path -> norm_path(path)
+_ABS_PATHS = {}  # (cwd, path) -> os.path.abspath(path)
+_POSIX_ABS_PATHS = {}  # (cwd, path) -> posix_path(os.path.abspath(path))
+
+
 def norm_path(path: str) -> str:
-    return posix_path(os.path.normpath(path))
+    try:
+        return _NORM_PATHS[path]
+    except KeyError:
+        norm = _NORM_PATHS[path] = posix_path(os.path.normpath(path))
+        return norm
+
+
+# same as os.path.abspath, keeps the os path separators
+def abs_path(path: str) -> str:
+    key = (os.getcwd(), path)
+    try:
+        return _ABS_PATHS[key]
+    except KeyError:
+        path_abs = _ABS_PATHS[key] = os.path.abspath(path)
+        return path_abs
+
+
+def posix_abs_path(path: str) -> str:
+    key = (os.getcwd(), path)
+    try:
+        return _POSIX_ABS_PATHS[key]
+    except KeyError:
+        path_abs = _POSIX_ABS_PATHS[key] = posix_path(abs_path(path))
+        return path_abs
 
 
 def join_path(*paths) -> str:
@@ -200,7 +227,7 @@ def join_path(*paths) -> str:
     if len(paths) > 1:
         if "" in paths:
             paths.remove("")
-        return posix_path(os.path.normpath("/".join(paths)))
+        return norm_path("/".join(paths))
     return posix_path(paths[0])
 
 
@@ -214,6 +241,11 @@ def check_file_path_glob(file_path: str) -> bool:
     return "*" in file_path or "[" in file_path and "]" in file_path or "?" in file_path
 
 
+def glob_files(pattern: str, recursive: bool = False) -> list:
+    with qpc_trace.span("glob", {"pattern": pattern}):
+        return glob.glob(pattern, recursive=recursive)
+
+
 def create_directory(directory: str):
     if not os.path.isdir(directory):
         os.makedirs(directory)
@@ -221,6 +253,22 @@ def create_directory(directory: str):
             print("Created Directory: " + directory)
 
 
+# every file a generator has written this run, absolute paths
+# the run hash uses this to know what has to still exist for a run to be skipped
+GENERATED_FILES = set()
+
+
+def add_generated_file(file_path: str) -> None:
+    qpc_trace.COUNTERS["files_written"] += 1
+    GENERATED_FILES.add(posix_abs_path(file_path))
+
+
+def write_generated_file(file_path: str, text: str) -> None:
+    with open(file_path, "w", encoding="utf-8") as file_io:
+        file_io.write(text)
+    add_generated_file(file_path)
+
+
 def get_all_dict_values(d: dict):
     found_values = []
     for k, v in d.items():
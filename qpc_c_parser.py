@@ -4,18 +4,39 @@
 # ==================================================================================================
 
 import re
+import os
 import os.path
+import json
+import hashlib
+import mmap
+from itertools import repeat
 from qpc_args import args
+import qpc_base
+from qpc_base import posix_path, norm_path, posix_abs_path, create_directory, QPC_HASH_DIR
+from qpc_trace import COUNTERS
 
 include_pattern = re.compile(br"^[ \t]*#include[ \t]+[\"<]([a-zA-Z0-9\-_\./\\]+)[>\"]")
 
-INCLUDE_DICT_DIR = {}
+# ran once over the whole file instead of on every line
+# starts with "#include" instead of "^" so re can jump to each one, the start of the line is checked after
+include_pattern_buffer = re.compile(br"#include[ \t]+[\"<]([a-zA-Z0-9\-_\./\\]+)[>\"]")
+
+# for stopping early, comments are skipped over, and the first line of code ends the include region
+include_region_pattern = re.compile(
+    br"(?s:/\*.*?\*/)|//[^\n]*|^[ \t]*#include[ \t]+[\"<]([a-zA-Z0-9\-_\./\\]+)[>\"]|^[ \t]*([a-zA-Z_{])",
+    re.MULTILINE)
+
+# stop scanning a file at the first line of code after the includes at the top of it
+# off by default, since includes further down a file (after an extern "C" or in a namespace) get missed
+SCAN_STOP_EARLY = False
+
 INCLUDE_DICT = {}
 # HEADER_DICT = {}
 HEADER_PATHS = set()
 INVALID_PATHS = set()  # so we don't check the disk for paths that don't exist a million times
 
 INCLUDE_LIST_DIR = {}  # does os.listdir on these include folders
+INCLUDE_DIRS_ABS = {}  # (cwd, *include dirs) -> include dirs that exist, absolute
 EXCLUDE_DIRS = set()  # these directories don't exist
 
 EXCLUDE_LIST = {"windows.h", "Windows.h", "stdio.h", "crtdbg.h", "minidump.h", "string.h", "stdlib.h", "malloc.h",
@@ -32,101 +53,330 @@ HEADER_EXTS = {
 }
 
 
+# ==================================================================================================
+# Include Graph Cache
+# kept across runs in the hashes folder, so only files that changed since the last run get read again
+#   files: absolute path -> [mtime, size, include names in the file]
+#   resolved: include directories key -> {absolute path -> absolute paths of the headers it includes}
+#   dirs: every directory looked in to resolve headers, even ones that don't exist -> mtime (0 if it doesn't exist)
+#         if one changed, all resolved includes are redone, so headers that weren't found are looked for again
+# ==================================================================================================
+
+INCLUDE_CACHE_PATH = QPC_HASH_DIR + "include_cache.json"
+INCLUDE_CACHE_VERSION = 4
+
+# starting up a process pool is slow, so only use one when there's enough files to scan
+PROCESS_POOL_MIN_FILES = 64
+
+FILE_CACHE = {}
+RESOLVED_CACHE = {}
+DIR_MTIMES = {}
+SCANNED_FILES = set()  # files with a cache entry already checked against the disk this run
+
+INCLUDE_CACHE_LOADED = False
+INCLUDE_CACHE_CHANGED = False
+
+
+def _get_stat(file_path: str) -> list:
+    try:
+        stat = os.stat(file_path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return []
+
+
+def get_mtime(directory: str) -> int:
+    try:
+        return os.stat(directory).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def load_include_cache() -> None:
+    global INCLUDE_CACHE_LOADED
+    if INCLUDE_CACHE_LOADED:
+        return
+    INCLUDE_CACHE_LOADED = True
+
+    try:
+        with open(INCLUDE_CACHE_PATH, mode="r", encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return
+
+    if cache.get("version") != INCLUDE_CACHE_VERSION or cache.get("stop_early") != SCAN_STOP_EARLY:
+        return
+
+    FILE_CACHE.update(cache["files"])
+
+    # a header added or removed in a directory we listed could change what an include resolves to
+    for directory, mtime in cache["dirs"].items():
+        if get_mtime(directory) != mtime:
+            break
+    else:
+        RESOLVED_CACHE.update(cache["resolved"])
+        DIR_MTIMES.update(cache["dirs"])
+
+
+def save_include_cache() -> None:
+    if not INCLUDE_CACHE_CHANGED:
+        return
+
+    cache = {
+        "version": INCLUDE_CACHE_VERSION,
+        "stop_early": SCAN_STOP_EARLY,
+        "files": FILE_CACHE,
+        "resolved": RESOLVED_CACHE,
+        "dirs": DIR_MTIMES,
+    }
+
+    create_directory(QPC_HASH_DIR)
+    with open(INCLUDE_CACHE_PATH, mode="w", encoding="utf-8") as cache_file:
+        json.dump(cache, cache_file)
+
+
+def _get_resolve_key(include_dirs: list) -> str:
+    # headers are also checked relative to the current directory
+    return hashlib.md5("\n".join([os.getcwd(), *include_dirs]).encode()).hexdigest()
+
+
+# the old line by line scanner, kept for comparing against in benchmarks
+def _read_include_names_lines(file_path: str) -> list:
+    with open(file_path, 'rb') as f:
+        lines = f.read().splitlines()
+
+    include_names = []
+    for line in lines:
+        found_header = include_pattern.match(line.strip())
+        if found_header:
+            include_names.append(found_header.group(1).decode())
+    return include_names
+
+
+def _read_include_names(file_path: str, stop_early: bool = False) -> list:
+    with open(file_path, 'rb') as f:
+        # can't mmap an empty file
+        if not os.fstat(f.fileno()).st_size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if not stop_early:
+                include_names = []
+                for match in include_pattern_buffer.finditer(buffer):
+                    include_start = match.start()
+                    line_start = buffer.rfind(b"\n", 0, include_start) + 1
+                    if line_start == include_start or not buffer[line_start:include_start].strip():
+                        include_names.append(match.group(1).decode())
+                return include_names
+
+            include_names = []
+            for match in include_region_pattern.finditer(buffer):
+                found_header, found_code = match.groups()
+                if found_header:
+                    include_names.append(found_header.decode())
+                elif found_code:
+                    break
+            return include_names
+
+
+# run in the process pool, so this can't touch anything global
+def _scan_file(file_path: str, stop_early: bool = False) -> tuple:
+    # stat before reading, so if it's modified while reading, it gets scanned again next time
+    stat = _get_stat(file_path)
+    if not stat:
+        return file_path, None
+    try:
+        return file_path, [*stat, _read_include_names(file_path, stop_early)]
+    except (OSError, ValueError):
+        return file_path, None
+
+
+def scan_files(file_paths: list) -> None:
+    global INCLUDE_CACHE_CHANGED
+    load_include_cache()
+
+    changed_files = []
+    for file_path in file_paths:
+        if file_path in SCANNED_FILES:
+            continue
+        SCANNED_FILES.add(file_path)
+        cache_entry = FILE_CACHE.get(file_path)
+        if cache_entry is None or cache_entry[:2] != _get_stat(file_path):
+            changed_files.append(file_path)
+        else:
+            COUNTERS["include_scan.cached"] += 1
+
+    COUNTERS["include_scan.scanned"] += len(changed_files)
+
+    if not changed_files:
+        return
+
+    INCLUDE_CACHE_CHANGED = True
+
+    if len(changed_files) >= PROCESS_POOL_MIN_FILES:
+        # imported here since it's slow to import, and most runs don't need it
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor() as pool:
+            chunk_size = max(1, len(changed_files) // (4 * (os.cpu_count() or 1)))
+            scanned_files = list(pool.map(_scan_file, changed_files, repeat(SCAN_STOP_EARLY), chunksize=chunk_size))
+    else:
+        scanned_files = [_scan_file(file_path, SCAN_STOP_EARLY) for file_path in changed_files]
+
+    for file_path, cache_entry in scanned_files:
+        if cache_entry is None:
+            FILE_CACHE.pop(file_path, None)
+        else:
+            FILE_CACHE[file_path] = cache_entry
+        # what this file includes might be different now
+        for resolved_includes in RESOLVED_CACHE.values():
+            resolved_includes.pop(file_path, None)
+
+
+def _get_direct_includes(file_path: str, include_dirs: list, resolved_includes: dict) -> list:
+    global INCLUDE_CACHE_CHANGED
+    if file_path not in resolved_includes:
+        cache_entry = FILE_CACHE.get(file_path)
+        resolved_includes[file_path] = _resolve_includes(cache_entry[2], include_dirs) if cache_entry else []
+        INCLUDE_CACHE_CHANGED = True
+        COUNTERS["include_resolve.resolved"] += 1
+    else:
+        COUNTERS["include_resolve.cached"] += 1
+    return resolved_includes[file_path]
+
+
+# the headers each file includes, directly or through other headers
+def get_includes_recursive(file_paths: list, include_dirs: list) -> dict:
+    include_dirs = [] if include_dirs is None else include_dirs
+    load_include_cache()
+    resolved_includes = RESOLVED_CACHE.setdefault(_get_resolve_key(include_dirs), {})
+
+    root_paths = [posix_abs_path(file_path) for file_path in file_paths]
+
+    # go through the graph a level at a time, so all the files that need scanning in a level are scanned together
+    found_paths = set(root_paths)
+    current_level = list(found_paths)
+    while current_level:
+        scan_files(current_level)
+        next_level = []
+        for file_path in current_level:
+            for header_path in _get_direct_includes(file_path, include_dirs, resolved_includes):
+                if header_path not in found_paths:
+                    found_paths.add(header_path)
+                    next_level.append(header_path)
+        current_level = next_level
+
+    all_includes = {}
+    for file_path, root_path in zip(file_paths, root_paths):
+        all_includes[file_path] = _get_include_closure(root_path, resolved_includes)
+    return all_includes
+
+
+def _get_include_closure(root_path: str, resolved_includes: dict) -> list:
+    closure = []
+    visited = {root_path}
+    stack = [root_path]
+    while stack:
+        for header_path in reversed(resolved_includes.get(stack.pop(), ())):
+            if header_path not in visited:
+                visited.add(header_path)
+                closure.append(header_path)
+                stack.append(header_path)
+    return closure
+
+
 # headers include probably wouldn't speed anything up tbh
 def get_includes(file_path: str, include_dirs: list, headers: list) -> list:
-    abs_path = os.path.abspath(file_path)  # some files might have the same relative path, but different abs paths
+    abs_path = qpc_base.abs_path(file_path)  # some files might have the same relative path, but different abs paths
     if abs_path not in INCLUDE_DICT:
         INCLUDE_DICT[abs_path] = _get_includes(abs_path, include_dirs)
 
     return INCLUDE_DICT[abs_path]
 
-    # this takes slightly longer, but then it won't use absolute directories
-    rel_path = os.getcwd().split(args.root_dir)
-    rel_path = rel_path[1] if len(rel_path) == 2 else ""
 
-    cwd = "{0}".format("../" * rel_path.count("/"))
-    if cwd not in INCLUDE_DICT_DIR:
-        INCLUDE_DICT_DIR[cwd] = {}
+def _get_includes(file_path: str, include_dirs: list) -> list:
+    include_dirs = [] if include_dirs is None else include_dirs
+    file_path = posix_path(file_path)
+    scan_files([file_path])
+    resolved_includes = RESOLVED_CACHE.setdefault(_get_resolve_key(include_dirs), {})
+    return _get_direct_includes(file_path, include_dirs, resolved_includes)
 
-    if abs_path not in INCLUDE_DICT:
-        INCLUDE_DICT[abs_path] = _get_includes(abs_path, include_dirs)
 
-    if abs_path not in INCLUDE_DICT_DIR[cwd]:
-        INCLUDE_DICT_DIR[cwd][abs_path] = [os.path.relpath(include) for include in INCLUDE_DICT[abs_path]]
+def _list_dir(directory: str) -> None:
+    INCLUDE_LIST_DIR[directory] = set(os.listdir(directory))
+    DIR_MTIMES[directory] = get_mtime(directory)
 
-    try:
-        return INCLUDE_DICT_DIR[cwd][abs_path]
-    except KeyError as F:
-        print(F)
 
+# a header added to or removed from a directory we looked in can change what an include resolves to
+def _add_dir_mtime(directory: str) -> None:
+    if directory not in DIR_MTIMES:
+        DIR_MTIMES[directory] = get_mtime(directory)
 
-def _get_includes(file_path: str, include_dirs: list) -> list:
-    includes = []
-    include_dirs = [] if include_dirs is None else include_dirs
 
-    if os.path.isfile(file_path):
-        with open(file_path, 'rb') as f:
-            lines = f.read().splitlines()
-    else:
-        return []
+def _get_include_dirs_abs(include_dirs: list) -> list:
+    # every file in a project has the same include dirs, so only do this once for them
+    key = (os.getcwd(), *include_dirs)
+    if key in INCLUDE_DIRS_ABS:
+        return INCLUDE_DIRS_ABS[key]
 
-    include_dirs_abs = []
+    include_dirs_abs = INCLUDE_DIRS_ABS[key] = []
     for include_dir in include_dirs:
-        include_dir_abs = os.path.abspath(include_dir)
+        include_dir_abs = posix_abs_path(include_dir)
         if include_dir_abs in EXCLUDE_DIRS:
             continue
         elif include_dir_abs in INCLUDE_LIST_DIR:
             include_dirs_abs.append(include_dir_abs)
         elif os.path.isdir(include_dir_abs):
             include_dirs_abs.append(include_dir_abs)
-            INCLUDE_LIST_DIR[include_dir_abs] = set(os.listdir(include_dir_abs))
+            _list_dir(include_dir_abs)
         else:
             EXCLUDE_DIRS.add(include_dir_abs)
+            _add_dir_mtime(include_dir_abs)
+    return include_dirs_abs
+
+
+def _resolve_includes(include_names: list, include_dirs: list) -> list:
+    includes = []
+    include_dirs_abs = _get_include_dirs_abs(include_dirs)
 
     def add_header(_header: str, abs_path: str) -> None:
-        includes.append(abs_path)
+        abs_path = norm_path(abs_path)
+        if abs_path not in includes:
+            includes.append(abs_path)
         # HEADER_DICT[_header] = abs_path
         HEADER_PATHS.add(abs_path)
 
-    for line in lines:
-        line = line.strip()
-        found_header = include_pattern.match(line)
-        if found_header:
-            found_header = found_header.group(1).decode()
+    for found_header in include_names:
+        if found_header in EXCLUDE_LIST:
+            continue
 
-            if found_header in EXCLUDE_LIST:
-                continue
+        found_header_path, found_header_name = os.path.split(found_header)
+        for include_dir in include_dirs_abs:
+            path_extended = include_dir + "/" + found_header_path
+            if found_header_name in INCLUDE_LIST_DIR[include_dir] or \
+                    path_extended in INCLUDE_LIST_DIR and found_header_name in INCLUDE_LIST_DIR[path_extended]:
+                add_header(found_header, include_dir + "/" + found_header)
+                break
+        else:
+            header_paths = [include_dir + "/" + found_header for include_dir in include_dirs_abs]
+            header_paths.insert(0, qpc_base.abs_path(found_header))
 
-            found_header_path, found_header_name = os.path.split(found_header)
-            for include_dir in include_dirs_abs:
-                path_extended = include_dir + "/" + found_header_path
-                if found_header_name in INCLUDE_LIST_DIR[include_dir] or \
-                        path_extended in INCLUDE_LIST_DIR and found_header_name in INCLUDE_LIST_DIR[path_extended]:
-                    add_header(found_header, include_dir + "/" + found_header)
+            # the first path that exists wins, no matter what order files were scanned in
+            for header_path_abs in header_paths:
+                # check INVALID_PATHS and HEADER_PATHS first, much faster
+                if header_path_abs in INVALID_PATHS:
+                    continue
+                elif header_path_abs in HEADER_PATHS:
+                    add_header(found_header, header_path_abs)
+                    break
+                # then check the disk, last resort slow method
+                _add_dir_mtime(os.path.split(header_path_abs)[0])
+                if os.path.isfile(header_path_abs):
+                    _list_dir(os.path.split(header_path_abs)[0])
+                    add_header(found_header, header_path_abs)
                     break
-            else:
-                header_paths = [include_dir + "/" + found_header for include_dir in include_dirs_abs]
-                header_paths.insert(0, os.path.abspath(found_header))
-
-                # first check if its in INVALID_PATHS or in HEADER_PATHS, much faster
-                for header_path_abs in header_paths:
-                    if header_path_abs in INVALID_PATHS:
-                        break
-                    elif header_path_abs in HEADER_PATHS:
-                        add_header(found_header, header_path_abs)
-                        break
-                else:
-                    # then check the disk if none have been found, last resort slow method
-                    for header_path_abs in header_paths:
-                        if os.path.isfile(header_path_abs):
-                            header_dir = os.path.split(header_path_abs)[0]
-                            INCLUDE_LIST_DIR[header_dir] = set(os.listdir(header_dir))
-                            add_header(found_header, header_path_abs)
-                            break
-                        # adding it to this so we don't waste time checking the disk
-                        # for if the file exists, since we know it doesn't
-                        INVALID_PATHS.add(header_path_abs)
-                    # else:
-                    #     if not args.hide_warnings:
-                    #         print("File doesn't exist: " + found_header)
+                # adding it to this so we don't waste time checking the disk
+                # for if the file exists, since we know it doesn't
+                INVALID_PATHS.add(header_path_abs)
+                # else:
+                #     if not args.hide_warnings:
+                #         print("File doesn't exist: " + found_header)
     return includes
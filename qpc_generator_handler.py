@@ -1,10 +1,12 @@
 import sys
 import os
+import re
 # import qpc_hash
 from enum import Enum
 from glob import glob
 from qpc_args import args
-from qpc_base import BaseProjectGenerator, QPC_DIR, QPC_GENERATOR_DIR, post_args_init
+from qpc_logging import error
+from qpc_base import BaseProjectGenerator, Platform, QPC_DIR, QPC_GENERATOR_DIR, post_args_init
 
 
 GENERATOR_FOLDER = os.path.split(QPC_GENERATOR_DIR)[1]
@@ -13,11 +15,64 @@ GENERATOR_PATH = QPC_GENERATOR_DIR + "/**"
 GENERATOR_LIST = []
 GENERATOR_PATHS = []
 
-for generator_folder in glob(GENERATOR_PATH):
+# sorted so generator ids are the same every run
+for generator_folder in sorted(glob(GENERATOR_PATH)):
     __generator = generator_folder + os.sep + os.path.split(generator_folder)[1] + ".py"
     if os.path.isfile(__generator):
         GENERATOR_LIST.append(os.path.basename(__generator)[:-3])
-        GENERATOR_PATHS.append(__generator)
+        GENERATOR_PATHS.append(__generator.replace("\\", "/"))
+
+
+# ==================================================================================================
+# Generator Registry
+# reads what we need to know about a generator from its source, without importing it
+# so a generator and everything it imports (like lxml for visual studio) is only loaded if it's used
+# ==================================================================================================
+
+platform_call_pattern = re.compile(r"self\._add_platforms?\(([^)]*)\)")
+platform_name_pattern = re.compile(r"\s*Platform\.(\w+)\s*")
+
+
+class GeneratorInfo:
+    def __init__(self, filename: str, path: str, generator_id: int):
+        self.filename = filename
+        self.path = path
+        self.id = generator_id
+        self.platforms = None  # None if we couldn't tell from the source
+
+        with open(path, "r", encoding="utf-8") as file:
+            source = file.read()
+
+        # every argument has to be a Platform member, anything else can't be known without importing it
+        platform_names = []
+        for platform_call in platform_call_pattern.findall(source):
+            for platform_arg in platform_call.split(","):
+                platform_name = platform_name_pattern.fullmatch(platform_arg)
+                if not platform_name or platform_name.group(1) not in Platform.__members__:
+                    return
+                platform_names.append(platform_name.group(1))
+        if platform_names:
+            self.platforms = [Platform[name] for name in platform_names]
+
+    def supports_platforms(self, platforms) -> bool:
+        if self.platforms is None:
+            error(f"Can't find the platforms supported by generator \"{self.filename}\" in its source: {self.path}",
+                  "Call self._add_platform or self._add_platforms with Platform members directly in __init__")
+        return bool(set(platforms).intersection(self.platforms))
+
+    def check_platforms(self, generator: BaseProjectGenerator) -> None:
+        # what we read from the source has to match what it says once imported, or we'd skip it when we shouldn't
+        if set(generator.get_supported_platforms()) != set(self.platforms):
+            error(f"Platforms read from the source of generator \"{self.filename}\" don't match what it supports: "
+                  f"{[platform.name for platform in self.platforms]} in the source, "
+                  f"{[platform.name for platform in generator.get_supported_platforms()]} after importing it",
+                  "Call self._add_platform or self._add_platforms with Platform members directly in __init__")
+
+
+GENERATOR_REGISTRY = {}
+
+for __index, __name in enumerate(GENERATOR_LIST):
+    GENERATOR_REGISTRY[__name] = GeneratorInfo(__name, GENERATOR_PATHS[__index], __index)
 
 
 def str_to_class(class_name: str):
@@ -43,28 +98,33 @@ class GeneratorHandler:
         self.project_generator_modules = {}
         self.project_generators_all = []
         self.project_generators = []
-        
-        [self._import_generator(name) for name in GENERATOR_LIST]
-        [self._init_generator(project_generator_type) for project_generator_type in inheritors(BaseProjectGenerator)]
             
     def _import_generator(self, name: str):
         __import__(f"{GENERATOR_FOLDER}.{name}.{name}", locals(), globals())
         self.project_generator_modules[name] = str_to_class(f"{GENERATOR_FOLDER}.{name}.{name}")
         
-    def _init_generator(self, project_generator_type: type):
-        project_generator = project_generator_type()
-        for index, generator_module in enumerate(self.project_generator_modules.values()):
-            if project_generator_type in generator_module.__dict__.values():
-                project_generator.path = generator_module.__file__.replace("\\", "/")
-                project_generator.filename = os.path.basename(project_generator.path)[:-3]
-                project_generator.id = index
-                break
-        self.project_generators_all.append(project_generator)
+    def _init_generator(self, name: str):
+        generator_module = self.project_generator_modules[name]
+        generator_info = GENERATOR_REGISTRY[name]
+        for project_generator_type in inheritors(BaseProjectGenerator):
+            if project_generator_type.__module__ == generator_module.__name__:
+                project_generator = project_generator_type()
+                project_generator.path = generator_info.path
+                project_generator.filename = generator_info.filename
+                project_generator.id = generator_info.id
+                self.project_generators_all.append(project_generator)
+                return project_generator
         
+    # only imports generators that are selected and can generate for any of the platforms selected
     def post_args_init(self):
         post_args_init()
-        for generator in self.project_generators_all:
-            if generator.filename in args.generators:
+        for name in args.generators:
+            if not GENERATOR_REGISTRY[name].supports_platforms(args.platforms):
+                continue
+            self._import_generator(name)
+            generator = self._init_generator(name)
+            if generator:
+                GENERATOR_REGISTRY[name].check_platforms(generator)
                 self.project_generators.append(generator)
         [generator.post_args_init() for generator in self.project_generators]
             
@@ -72,7 +132,7 @@ class GeneratorHandler:
         return [project_generator.output_type for project_generator in self.project_generators]
     
     def get_generator_args(self):
-        return [project_generator.filename for project_generator in self.project_generators_all]
+        return list(GENERATOR_REGISTRY)
     
     def get_generators(self, generator_names: list) -> list:
         return [self.get_generator(name) for name in generator_names]
@@ -1,27 +1,41 @@
 import hashlib
+import json
 import qpc_reader
+import qpc_profile
+from qpc_trace import COUNTERS
 from qpc_args import args
-from qpc_base import posix_path, QPC_DIR, QPC_GENERATOR_DIR
+from qpc_base import posix_path, norm_path, posix_abs_path, glob_files, QPC_DIR, QPC_GENERATOR_DIR, QPC_HASH_DIR, GENERATED_FILES
 from qpc_reader import QPCBlockBase, QPCBlock
-from qpc_generator_handler import GENERATOR_PATHS, GENERATOR_LIST
+from qpc_generator_handler import GENERATOR_REGISTRY
 from qpc_logging import verbose
 import qpc_parser
 import qpc_project
-import glob
 import os
-    
+from stat import S_ISREG
+from collections import deque
+from enum import Enum
+
 
-QPC_HASH_DIR = QPC_DIR + "hashes/"
+# absolute path -> (stat from just before it was last hashed, md5), so a run input gets the stat of what was hashed
+HASH_STATS = {}
 
 
 # Source: https://bitbucket.org/prologic/tools/src/tip/md5sum
 def make_hash(filename: str) -> str:
     md5 = hashlib.md5()
-    if os.path.isfile(filename):
+    COUNTERS["make_hash"] += 1
+    try:
+        file_stat = os.stat(filename)
+    except OSError:
+        file_stat = None
+    if file_stat and S_ISREG(file_stat.st_mode):
         with open(filename, "rb") as f:
             for chunk in iter(lambda: f.read(128 * md5.block_size), b""):
+                COUNTERS["make_hash.bytes"] += len(chunk)
                 md5.update(chunk)
-        return md5.hexdigest()
+        file_hash = md5.hexdigest()
+        HASH_STATS[posix_abs_path(filename)] = ([file_stat.st_mtime_ns, file_stat.st_size], file_hash)
+        return file_hash
     else:
         return ""
     
@@ -32,36 +46,59 @@ def hash_from_string(string: str):
 
 BASE_QPC_HASH_LIST = (
     "qpc.py",
+    "qpc_args.py",
     "qpc_base.py",
     "qpc_c_parser.py",
     "qpc_hash.py",
+    "qpc_logging.py",
+    "qpc_memory.py",
     "qpc_parser.py",
+    "qpc_profile.py",
     "qpc_project.py",
+    "qpc_query.py",
     "qpc_reader.py",
+    "qpc_trace.py",
     # "qpc_vpc_converter.py",
     "qpc_generator_handler.py",
 )
         
         
 QPC_BASE_HASHES = {}
-QPC_GENERATOR_HASHES = {}
+QPC_GENERATOR_HASHES = {}  # only the generators selected, filled in post_args_init
 
-for file in BASE_QPC_HASH_LIST:
-    QPC_BASE_HASHES[QPC_DIR + file] = make_hash(QPC_DIR + file)
-    
-for file in GENERATOR_LIST:
-    _generator = f"{QPC_GENERATOR_DIR}/{file}/{file}.py"
-    QPC_GENERATOR_HASHES[_generator] = make_hash(_generator)
+with qpc_profile.phase("hash qpc scripts"):
+    for file in BASE_QPC_HASH_LIST:
+        QPC_BASE_HASHES[QPC_DIR + file] = make_hash(QPC_DIR + file)
     
-QPC_HASHES = {**QPC_BASE_HASHES, **QPC_GENERATOR_HASHES}
+QPC_HASHES = {**QPC_BASE_HASHES}
 
 CHECKED_HASHES = {}
 GENERATOR_FILE_NAMES = []
 ARCH_NAMES = []
 
+# every input file looked at this run, absolute path -> (stat when it was read, md5 or None if it still needs hashing)
+RUN_INPUTS = {}
+# every glob used this run, absolute pattern -> hash of the files it found
+RUN_GLOBS = {}
+
+# attributes of the project model that are back references,
+# or that change without changing anything generated from it (like a comment in a script changing its hash)
+# the file masks are indexes into a table shared with the other passes, the files are hashed on their own
+SEMANTIC_HASH_SKIP = {"container", "base_info", "info", "hash_list", "generators", "source_file_mask", "file_mask"}
+
+# only these can change what gets generated, so --verbose or --time won't invalidate the run hash
+RUN_HASH_ARGS = (
+    "root_dir", "base_file", "out_dir", "check_files", "skip_projects", "configs", "platforms", "archs",
+    "generators", "add", "remove", "add_tree", "add_depend", "macros", "master_file",
+)
+
 
 def post_args_init():
     GENERATOR_FILE_NAMES.extend([os.path.splitext(os.path.basename(__generator))[0] for __generator in args.generators])
+    for generator_name in args.generators:
+        generator_path = GENERATOR_REGISTRY[generator_name].path
+        QPC_GENERATOR_HASHES[generator_path] = make_hash(generator_path)
+    QPC_HASHES.update(QPC_GENERATOR_HASHES)
     ARCH_NAMES.extend([arch.name.casefold() for arch in args.archs])
 
 
@@ -89,8 +126,9 @@ def check_hash(project_path: str, print_allowed: bool = True) -> bool:
     project_dir = os.path.split(project_path)[0]
     total_blocks = sorted(("commands", "glob_files", "hashes"))
     blocks_found = []
-    CHECKED_HASHES[project_path] = {"result": True, "generators": [], "rebuild_all": False}
+    CHECKED_HASHES[project_path] = {"result": True, "generators": [], "rebuild_all": False, "generator_hashes": {}}
     result = True
+    add_run_input(project_hash_file_path)
     
     if os.path.isfile(project_hash_file_path):
         hash_file = qpc_reader.read_file(project_hash_file_path)
@@ -105,7 +143,11 @@ def check_hash(project_path: str, print_allowed: bool = True) -> bool:
                 CHECKED_HASHES[project_path]["result"] = False
                 return False
             
-            if block.key == "commands":
+            if block.key == "generator_hashes":
+                for generator_block in block.items:
+                    CHECKED_HASHES[project_path]["generator_hashes"][generator_block.values[0]] = generator_block.key
+            
+            elif block.key == "commands":
                 blocks_found.append(block.key)
                 result = _check_commands(project_dir, block.items, 4)
                 CHECKED_HASHES[project_path]["rebuild_all"] = not result
@@ -145,11 +187,14 @@ def _project_check_file_hash(project_dir: str, hash_list: list, project_path: st
     result = True
     for hash_block in hash_list:
         if os.path.isabs(hash_block.values[0]) or not project_dir:
-            project_file_path = posix_path(os.path.normpath(hash_block.values[0]))
+            project_file_path = norm_path(hash_block.values[0])
         else:
-            project_file_path = posix_path(os.path.normpath(project_dir + "/" + hash_block.values[0]))
+            project_file_path = norm_path(project_dir + "/" + hash_block.values[0])
         
-        if hash_block.key != make_hash(project_file_path):
+        file_hash = make_hash(project_file_path)
+        if project_file_path not in QPC_HASHES:
+            add_run_input(project_file_path, file_hash)
+        if hash_block.key != file_hash:
             if not CHECKED_HASHES[project_path]["rebuild_all"] and hash_block.values[0] in QPC_GENERATOR_HASHES:
                 generator_name = os.path.splitext(os.path.basename(hash_block.values[0]))[0]
                 if generator_name in args.generators:
@@ -166,6 +211,7 @@ def check_master_file_hash(project_path: str, base_info, generator, hash_list: d
     project_dir = os.path.split(project_path)[0]
     total_blocks = sorted(("commands", "hashes", "files"))
     blocks_found = []
+    add_run_input(project_hash_file_path)
     
     if os.path.isfile(project_hash_file_path):
         hash_file = qpc_reader.read_file(project_hash_file_path)
@@ -209,6 +255,7 @@ def check_master_file_hash(project_path: str, base_info, generator, hash_list: d
     
     
 def get_out_dir(project_hash_file_path):
+    add_run_input(project_hash_file_path)
     if os.path.isfile(project_hash_file_path):
         hash_file = qpc_reader.read_file(project_hash_file_path)
         
@@ -221,7 +268,7 @@ def get_out_dir(project_hash_file_path):
             print("hold up")
             return ""
         
-        return posix_path(os.path.normpath(commands_block.get_item_values("working_dir")[0]))
+        return norm_path(commands_block.get_item_values("working_dir")[0])
         # working_dir = commands_block.get_item_values("working_dir")[0]
         # out_dir = commands_block.get_item_values("out_dir")[0]
         # return posix_path(os.path.normpath(working_dir + "/" + out_dir))
@@ -279,9 +326,9 @@ def _check_commands(project_dir: str, command_list: list, total_commands: int) -
 def _check_file_hash(project_dir: str, hash_list: list) -> bool:
     for hash_block in hash_list:
         if os.path.isabs(hash_block.values[0]) or not project_dir:
-            project_file_path = posix_path(os.path.normpath(hash_block.values[0]))
+            project_file_path = norm_path(hash_block.values[0])
         else:
-            project_file_path = posix_path(os.path.normpath(project_dir + "/" + hash_block.values[0]))
+            project_file_path = norm_path(project_dir + "/" + hash_block.values[0])
         
         if hash_block.key != make_hash(project_file_path):
             verbose("File Modified: " + hash_block.values[0])
@@ -300,9 +347,9 @@ def _check_files(project_dir, hash_file_list, file_list, project_def_list: dict
         dependency_hash = dependency_hash[0] if dependency_hash else ""
         
         if os.path.isabs(hash_path) or not project_dir:
-            hash_path = posix_path(os.path.normpath(hash_path))
+            hash_path = norm_path(hash_path)
         else:
-            hash_path = posix_path(os.path.normpath(project_dir + "/" + hash_path))
+            hash_path = norm_path(project_dir + "/" + hash_path)
             
         if hash_path not in file_list.values():
             verbose("New project added: " + file_block.key)
@@ -340,7 +387,8 @@ def _check_glob_files(project_dir: str, file_list: list) -> bool:
         file_hash = file_block.key
         file_glob = file_block.values[0]
         
-        glob_list = glob.glob(project_dir + "/" + file_glob)
+        glob_list = glob_files(project_dir + "/" + file_glob)
+        add_run_glob(project_dir + "/" + file_glob, glob_list)
         for index, path in enumerate(glob_list):
             glob_list[index] = posix_path(path)
             
@@ -354,7 +402,7 @@ def _check_glob_files(project_dir: str, file_list: list) -> bool:
     
     
 def get_hash_file_path(project_path) -> str:
-    return posix_path(os.path.normpath(QPC_HASH_DIR + get_hash_file_name(project_path)))
+    return norm_path(QPC_HASH_DIR + get_hash_file_name(project_path))
     
     
 def get_hash_file_name(project_path) -> str:
@@ -371,6 +419,7 @@ def get_hash_file_ext(project_path) -> str:
 def get_project_dependencies(project_path: str, recurse: bool = False) -> list:
     project_hash_file_path = get_hash_file_path(project_path)
     dep_list = set()
+    add_run_input(project_hash_file_path)
 
     if os.path.isfile(project_hash_file_path):
         hash_file = qpc_reader.read_file(project_hash_file_path)
@@ -395,9 +444,15 @@ def get_project_dependencies(project_path: str, recurse: bool = False) -> list:
     return list(dep_list)
 
 
-def write_project_hash(project_path: str, project: qpc_project.ProjectContainer, generators: list) -> None:
+def write_project_hash(project_path: str, project: qpc_project.ProjectContainer, generators: list,
+                       generator_hashes: dict = None) -> None:
     base_block = QPCBlockBase(project_path)
     
+    # first, so check_hash always reads it, even if something else in the hash file is outdated
+    if generator_hashes:
+        generator_hashes_block = base_block.add_item("generator_hashes", [])
+        [generator_hashes_block.add_item(hash_value, name) for name, hash_value in generator_hashes.items()]
+    
     _write_hash_commands(base_block, project.out_dir)
     
     hashes = base_block.add_item("hashes", [])
@@ -407,13 +462,20 @@ def write_project_hash(project_path: str, project: qpc_project.ProjectContainer,
         if generator.path in QPC_GENERATOR_HASHES:
             hashes.add_item(QPC_GENERATOR_HASHES[generator.path], generator.path)
     
+    project_dir = os.path.split(project_path)[0]
     hash_list = project.get_hashes()
     if hash_list:
         [hashes.add_item(hash_value, script_path) for script_path, hash_value in hash_list.items()]
+        for script_path, hash_value in hash_list.items():
+            if os.path.isabs(script_path) or not project_dir:
+                add_run_input(script_path, hash_value)
+            else:
+                add_run_input(project_dir + "/" + script_path, hash_value)
         
     glob_files_block = base_block.add_item("glob_files", [])
     for path in project.get_glob_files():
-        found_files = glob.glob(os.path.split(project_path)[0] + "/" + path)
+        found_files = glob_files(project_dir + "/" + path)
+        add_run_glob(project_dir + "/" + path, found_files)
         for index, _path in enumerate(found_files):
             found_files[index] = posix_path(_path)
         found_files.sort()
@@ -425,6 +487,91 @@ def write_project_hash(project_path: str, project: qpc_project.ProjectContainer,
 
     with open(get_hash_file_path(project_path), mode="w", encoding="utf-8") as hash_file:
         hash_file.write(base_block.to_string(True, True))
+    add_run_input(get_hash_file_path(project_path))
+
+
+# ==================================================================================================
+# Semantic Hashes
+# a hash of what a project resolves to after macros and conditions,
+# so a comment or whitespace change in a script doesn't regenerate every project that includes it
+# ==================================================================================================
+
+
+def _get_semantic_value(value):
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    
+    if isinstance(value, Enum):
+        return value.name
+    
+    # order matters here, it's the order things get written in
+    if isinstance(value, dict):
+        return [[_get_semantic_value(key), _get_semantic_value(item)] for key, item in value.items()]
+    
+    if isinstance(value, (list, tuple)):
+        return [_get_semantic_value(item) for item in value]
+    
+    if isinstance(value, (set, frozenset)):
+        return sorted([_get_semantic_value(item) for item in value], key=repr)
+    
+    return [[name, _get_semantic_value(getattr(value, name))] for name in _get_field_names(type(value), value)]
+
+
+_FIELD_NAMES = {}  # class with __slots__ -> its public fields
+
+
+def _get_field_names(cls, value) -> list:
+    if cls in _FIELD_NAMES:
+        return _FIELD_NAMES[cls]
+    if hasattr(value, "__dict__"):
+        return [name for name in vars(value) if not name.startswith("_") and name not in SEMANTIC_HASH_SKIP]
+    names = _FIELD_NAMES[cls] = [name for base in reversed(cls.__mro__) for name in base.__dict__.get("__slots__", ())
+                                 if not name.startswith("_") and name not in SEMANTIC_HASH_SKIP]
+    return names
+
+
+# equal values get equal keys, used to find passes that resolve to the same settings
+def get_structural_key(value) -> str:
+    return json.dumps(_get_semantic_value(value))
+
+
+def get_pass_hash(project_pass: qpc_project.ProjectPass) -> str:
+    return hash_from_string(json.dumps(_get_semantic_value(project_pass)))
+
+
+# one hash per generator, of everything that generator gets from this project
+def get_generator_hashes(project: qpc_project.ProjectContainer, generators: list) -> dict:
+    project_hash = hash_from_string(json.dumps([
+        get_tool_hash(),
+        project.file_name,
+        project.project_path,
+        project.out_dir,
+        project.base_info.get_configs(),
+        _get_semantic_value(project.dependencies),
+    ]))
+    
+    pass_hashes = {}
+    generator_hashes = {}
+    for generator in generators:
+        generator_pass_hashes = []
+        for project_pass in project.get_passes(generator.id):
+            if project_pass not in pass_hashes:
+                pass_hashes[project_pass] = get_pass_hash(project_pass)
+            generator_pass_hashes.append(pass_hashes[project_pass])
+        # sorted since the pass order isn't stable between runs (archs come from a set)
+        generator_pass_hashes.sort()
+        generator_hashes[generator.filename] = hash_from_string(
+            " ".join([project_hash, generator.filename, *generator_pass_hashes]))
+    
+    return generator_hashes
+
+
+# is what this generator would get the same as what it got in the last run
+def check_generator_hash(project_path: str, generator, generator_hashes: dict) -> bool:
+    if project_path not in CHECKED_HASHES:
+        return False
+    old_hash = CHECKED_HASHES[project_path]["generator_hashes"].get(generator.filename)
+    return bool(old_hash) and old_hash == generator_hashes.get(generator.filename)
 
 
 def write_master_file_hash(project_path: str, base_info, platforms: list, generator_path: str, out_dir: str = ""):
@@ -465,6 +612,7 @@ def write_master_file_hash(project_path: str, base_info, platforms: list, genera
 
     with open(get_hash_file_path(project_path), mode="w", encoding="utf-8") as hash_file:
         hash_file.write(base_block.to_string(True, True))
+    add_run_input(get_hash_file_path(project_path))
         
         
 def _write_hash_commands(base_block: QPCBlockBase, out_dir: str = "", master_file: bool = False) -> None:
@@ -485,3 +633,298 @@ def _write_hash_paths(base_block: QPCBlockBase, hash_file_paths: dict):
     if hash_file_paths:
         files = base_block.add_item("files", [])
         [files.add_item(hash_path, script_path) for script_path, hash_path in hash_file_paths.items()]
+
+
+# ==================================================================================================
+# Run Hash
+# a fingerprint of the whole run, if nothing in it changed since the last successful run
+# with the same arguments, then we can skip parsing anything at all
+# ==================================================================================================
+
+
+# hash given for a file that changed after this run read it, it never matches, so the next run can't be skipped
+CHANGED_DURING_RUN = "changed during run"
+
+
+def add_run_input(file_path: str, file_hash: str = None) -> None:
+    file_path = posix_abs_path(file_path)
+    hashed = HASH_STATS.get(file_path)
+    if file_hash and hashed and hashed[1] == file_hash:
+        RUN_INPUTS[file_path] = hashed
+    else:
+        RUN_INPUTS[file_path] = (get_stat(file_path), file_hash)
+
+
+def add_run_glob(pattern: str, found_files: list) -> None:
+    RUN_GLOBS[posix_abs_path(pattern)] = _hash_glob_result(found_files)
+
+
+def _hash_glob_result(found_files: list) -> str:
+    return hash_from_string(' '.join(sorted([posix_abs_path(path) for path in found_files])))
+
+
+def _get_run_hash_args() -> dict:
+    run_args = {}
+    for name in RUN_HASH_ARGS:
+        value = args.__dict__.get(name)
+        if isinstance(value, (list, tuple)):
+            value = [item.name if hasattr(item, "name") else item for item in value]
+        run_args[name] = value
+    return run_args
+
+
+def get_run_args_hash() -> str:
+    return hash_from_string(json.dumps(_get_run_hash_args(), sort_keys=True))
+
+
+def get_run_hash_path() -> str:
+    return QPC_HASH_DIR + "run_" + get_run_args_hash() + ".json"
+
+
+def get_tool_hash() -> str:
+    return hash_from_string(' '.join([f"{path}={QPC_HASHES[path]}" for path in sorted(QPC_HASHES)]))
+
+
+def get_stat(file_path: str) -> list:
+    try:
+        stat = os.stat(file_path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return []
+
+
+def check_run_hash() -> bool:
+    reason = _check_run_hash()
+    if reason:
+        print("Full Run: " + reason)
+        return False
+    return True
+
+
+# returns why the run can't be skipped, or an empty string if it can be
+def _check_run_hash() -> str:
+    if args.force or args.force_master:
+        return "forced"
+    
+    run_hash_path = get_run_hash_path()
+    if not os.path.isfile(run_hash_path):
+        return "no previous run with these arguments"
+
+    try:
+        with open(run_hash_path, mode="r", encoding="utf-8") as run_hash_file:
+            run_hash = json.load(run_hash_file)
+    except (OSError, ValueError):
+        return "run hash is unreadable"
+    
+    if run_hash.get("tool_hash") != get_tool_hash():
+        return "qpc or generator scripts changed"
+
+    reason = check_run_inputs(run_hash["inputs"], run_hash["globs"])
+    if reason:
+        return reason
+
+    for file_path in run_hash["outputs"]:
+        if not os.path.isfile(file_path):
+            return "output missing: " + file_path
+        
+    return ""
+
+
+# inputs and globs written by get_run_inputs, returns what changed or an empty string
+def check_run_inputs(inputs: dict, globs: dict) -> str:
+    for file_path, (stat, file_hash) in inputs.items():
+        current_stat = get_stat(file_path)
+        if not current_stat:
+            if file_hash:
+                return "file removed: " + file_path
+            continue
+        if not file_hash:
+            return "file added: " + file_path
+        if args.trust_stat and current_stat == stat:
+            continue
+        if make_hash(file_path) != file_hash:
+            return "file modified: " + file_path
+    
+    for pattern, glob_hash in globs.items():
+        if _hash_glob_result(glob_files(pattern)) != glob_hash:
+            return "files found are different: " + pattern
+
+    return ""
+
+
+# hashes the inputs that weren't hashed when they were read
+# if one changed since then, what was generated might be from the old content, so it's saved as changed
+def _get_run_input(file_path: str) -> tuple:
+    file_stat, file_hash = RUN_INPUTS[file_path]
+    if file_hash is None:
+        file_hash = make_hash(file_path)
+        if get_stat(file_path) != file_stat:
+            file_hash = CHANGED_DURING_RUN
+        RUN_INPUTS[file_path] = (file_stat, file_hash)
+    return file_stat, file_hash
+
+
+def get_run_inputs() -> dict:
+    return {file_path: _get_run_input(file_path) for file_path in RUN_INPUTS}
+
+
+# only call after a successful run
+def write_run_hash() -> None:
+    run_hash_path = get_run_hash_path()
+    outputs = set(GENERATED_FILES)
+    
+    # outputs from projects that were valid this run were written by an earlier run
+    if os.path.isfile(run_hash_path):
+        try:
+            with open(run_hash_path, mode="r", encoding="utf-8") as run_hash_file:
+                outputs.update([path for path in json.load(run_hash_file)["outputs"] if os.path.isfile(path)])
+        except (OSError, ValueError, KeyError):
+            pass
+    
+    run_hash = {
+        "args": _get_run_hash_args(),
+        "tool_hash": get_tool_hash(),
+        "inputs": get_run_inputs(),
+        "globs": RUN_GLOBS,
+        "outputs": sorted(outputs),
+    }
+    
+    with open(run_hash_path, mode="w", encoding="utf-8") as run_hash_file:
+        json.dump(run_hash, run_hash_file, indent=1)
+
+
+# ==================================================================================================
+# Base Info Snapshot
+# the base info from the last run, saved with every base file it read and every path it checked,
+# if none of those changed, then it's loaded instead of parsing the base files again
+# it's saved before --add and --remove pick projects from it, so any selection of projects can use it
+# saved as plain json and built again from that, since the hashes folder is in the tree and anything could write to it
+# warnings from parsing the base files are saved with it, and printed again when it's used
+# ==================================================================================================
+
+BASE_INFO_ARGS = ("root_dir", "base_file", "platforms", "macros")
+BASE_INFO_VERSION = 3
+
+
+def get_base_info_path() -> str:
+    base_args = {name: value for name, value in _get_run_hash_args().items() if name in BASE_INFO_ARGS}
+    # base file paths are relative to where qpc is run from
+    base_args["cwd"] = posix_path(os.getcwd())
+    return QPC_HASH_DIR + "base_" + hash_from_string(json.dumps(base_args, sort_keys=True)) + ".json"
+
+
+# returns None if there isn't a snapshot, or if anything it was made from changed
+# the base info in it is from BaseInfo.to_data
+def load_base_info() -> dict:
+    if args.force:
+        return None
+    
+    try:
+        with open(get_base_info_path(), mode="r", encoding="utf-8") as snapshot_file:
+            snapshot = json.load(snapshot_file)
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(snapshot, dict) or snapshot.get("version") != BASE_INFO_VERSION or \
+            snapshot.get("tool_hash") != get_tool_hash():
+        return None
+    
+    try:
+        reason = check_run_inputs(snapshot["inputs"], snapshot["globs"])
+        if not reason:
+            for path, is_dir, exists in snapshot["info"]["checked_paths"]:
+                if (os.path.isdir(path) if is_dir else os.path.isfile(path)) != exists:
+                    reason = "path added or removed: " + path
+                    break
+    except (KeyError, TypeError, ValueError):
+        return None
+    
+    if reason:
+        verbose("Parsing base files: " + reason)
+        return None
+    
+    # the run hash still needs everything the base info came from
+    RUN_INPUTS.update({file_path: tuple(file_input) for file_path, file_input in snapshot["inputs"].items()})
+    RUN_GLOBS.update(snapshot["globs"])
+    return snapshot
+
+
+# input_paths and glob_patterns are what was added to RUN_INPUTS and RUN_GLOBS while parsing the base files
+def write_base_info(info, input_paths: list, glob_patterns: list, warnings: list) -> None:
+    inputs = {file_path: _get_run_input(file_path) for file_path in input_paths}
+    
+    snapshot = {
+        "version": BASE_INFO_VERSION,
+        "tool_hash": get_tool_hash(),
+        "inputs": inputs,
+        "globs": {pattern: RUN_GLOBS[pattern] for pattern in glob_patterns},
+        "warnings": warnings,
+        "info": info.to_data(),
+    }
+    
+    try:
+        with open(get_base_info_path(), mode="w", encoding="utf-8") as snapshot_file:
+            json.dump(snapshot, snapshot_file)
+    except OSError:
+        pass
+
+
+# ==================================================================================================
+# Project Dependency Graph
+# the dependencies of every project the last time it was parsed or checked, by project script,
+# so --add_tree and --add_depend can find every project they need without parsing all of them first
+# ==================================================================================================
+
+DEPENDENCY_GRAPH = {}  # project script -> scripts it depends on
+DEPENDENTS_GRAPH = {}  # project script -> scripts that depend on it
+
+
+def get_dependency_graph_path() -> str:
+    return QPC_HASH_DIR + "dependencies_" + hash_from_string(posix_path(args.root_dir)) + ".json"
+
+
+def _read_dependency_graph() -> dict:
+    try:
+        with open(get_dependency_graph_path(), mode="r", encoding="utf-8") as graph_file:
+            return json.load(graph_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_dependency_graph() -> None:
+    if DEPENDENCY_GRAPH:
+        return
+    # the projects picked depend on this, not just on the scripts of the projects picked
+    add_run_input(get_dependency_graph_path())
+    DEPENDENCY_GRAPH.update(_read_dependency_graph())
+    for project_path, dependencies in DEPENDENCY_GRAPH.items():
+        [DEPENDENTS_GRAPH.setdefault(dependency, []).append(project_path) for dependency in dependencies]
+
+
+# the projects given and every project they depend on, or every project depending on them if dependents is set
+def get_dependency_closure(project_paths: list, dependents: bool = False) -> list:
+    graph = DEPENDENTS_GRAPH if dependents else DEPENDENCY_GRAPH
+    found = dict.fromkeys(project_paths)  # dict keeps order
+    queue = deque(found)
+    while queue:
+        for project_path in graph.get(queue.popleft(), ()):
+            if project_path not in found:
+                found[project_path] = None
+                queue.append(project_path)
+    return list(found)
+
+
+# project_dependencies is only the projects used this run, the rest stay the same
+def write_dependency_graph(project_dependencies: dict) -> None:
+    graph = _read_dependency_graph()
+    new_graph = {**graph}
+    for project_path, dependencies in project_dependencies.items():
+        new_graph[posix_path(project_path)] = sorted(dependencies)
+    
+    # not written if nothing changed, it's a run input when picking projects with it
+    if new_graph != graph:
+        with open(get_dependency_graph_path(), mode="w", encoding="utf-8") as graph_file:
+            json.dump(new_graph, graph_file, indent=1, sort_keys=True)
+        # written by this run, so it's only an input as of now
+        if posix_abs_path(get_dependency_graph_path()) in RUN_INPUTS:
+            add_run_input(get_dependency_graph_path())
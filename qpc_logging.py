@@ -1,5 +1,7 @@
 import os
 import sys
+import json
+import atexit
 import platform
 from qpc_args import args
 from enum import Enum
@@ -50,34 +52,111 @@ class Severity(Enum):
     
     
 WARNING_COUNT = 0
+REPEATED_WARNING_COUNT = 0
+
+_warnings_printed = set()
+_log_json_file = None
+_recorded_warnings = None  # every warning is added to this while it's set, to print them again on a later run
+
+
+def post_args_init():
+    global _log_json_file
+    # a flush for every line is slow on terminals, qpc.py flushes after each project instead
+    # not on legacy windows consoles, since colors are set on the console directly there
+    if not _win32_legacy_con and hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(line_buffering=False)
+        # so a traceback on stderr comes after everything printed before it
+        sys.excepthook = _flush_excepthook
+
+    if args.log_json:
+        _log_json_file = open(args.log_json, mode="w", encoding="utf-8")
+        atexit.register(_log_json_file.close)
+
+
+def flush():
+    sys.stdout.flush()
+
+
+def _flush_excepthook(*exc_info):
+    flush()
+    sys.__excepthook__(*exc_info)
+
+
+# text can have functions that return the text instead of strings,
+# so it's only formatted if it's going to be printed: verbose(lambda: f"Set Macro: {name}")
+def _get_text(text) -> list:
+    return [item() if callable(item) else item for item in text]
+
+
+def _log_json(level: str, message: str, **extra) -> None:
+    if _log_json_file:
+        _log_json_file.write(json.dumps({"level": level, "message": message, **extra}) + "\n")
 
 
 def warning(*text):
+    text = _get_text(text)
     warning_no_line(*text[:-1], text[-1] + "\n")
 
 
+# with --hide-repeated-warnings, a warning that was already printed isn't printed again,
+# like the same line of a script in each config
 def warning_no_line(*text):
+    global WARNING_COUNT, REPEATED_WARNING_COUNT
+    WARNING_COUNT += 1
+    text = _get_text(text)
+    if _recorded_warnings is not None:
+        _recorded_warnings.append(text)
+    key = tuple(text)
+    repeated = key in _warnings_printed
+    if _log_json_file:
+        _log_json("warning", "\n".join(item.strip() for item in text), repeated=repeated)
+    if repeated and args.hide_repeated_warnings:
+        REPEATED_WARNING_COUNT += 1
+        return
+    _warnings_printed.add(key)
     if not args.hide_warnings:
         _print_severity(Severity.WARNING, "\n          ", *text)
-    global WARNING_COUNT
-    WARNING_COUNT += 1
+
+
+def record_warnings(warning_list: list = None):
+    global _recorded_warnings
+    _recorded_warnings = warning_list
+
+
+# warnings recorded on an earlier run, like ones from parsing base files that aren't parsed again this run
+def replay_warnings(warning_list: list):
+    [warning_no_line(*text) for text in warning_list]
 
 
 def error(*text):
+    text = _get_text(text)
+    if _log_json_file:
+        _log_json("error", "\n".join(item.strip() for item in text))
     _print_severity(Severity.ERROR, "\n        ", *text, "\n")
+    # stdout isn't line buffered, anything after this on stderr shouldn't show up before it
+    flush()
     quit(1)
 
 
 def verbose(*text):
     if args.verbose:
+        text = _get_text(text)
+        _log_json("verbose", "".join(text))
         print("".join(text))
 
 
 def verbose_color(color: Color, *text):
     if args.verbose:
+        text = _get_text(text)
+        _log_json("verbose", "".join(text))
         print_color(color, "".join(text))
 
 
+def print_repeated_warnings():
+    if REPEATED_WARNING_COUNT and not args.hide_warnings:
+        print(f"{REPEATED_WARNING_COUNT} repeated warnings not shown")
+
+
 def _print_severity(level: Severity, spacing: str, *text):
     print_color(level.value, f"[{level.name}] {spacing.join(text)}")
         
@@ -0,0 +1,151 @@
+# ==================================================================================================
+# Memory Profiler
+# tracemalloc snapshots at the end of each phase of a run, with what each phase allocated and kept,
+# where it was allocated, and how much memory each project left behind after it was parsed and generated
+# tracemalloc only sees memory python allocates, so memory used by lxml isn't in it, but it is in the rss
+# ==================================================================================================
+
+import sys
+import json
+import tracemalloc
+from contextlib import nullcontext
+
+from qpc_profile import get_memory
+
+
+MEMORY_ENABLED = False
+TOP_SITES = 10
+
+PHASES = []  # [name, snapshot, current, peak, rss]
+PROJECTS = {}  # project script -> memory still allocated after it was done
+
+_ignore_filters = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def enable(frames: int = 1) -> None:
+    global MEMORY_ENABLED
+    MEMORY_ENABLED = True
+    tracemalloc.start(frames)
+    end_phase("start")
+
+
+def get_peak_rss() -> int:
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    except ImportError:
+        return get_memory()
+
+
+# takes a snapshot for the phase that just ended, the peak is only for this phase if reset_peak exists (3.9+)
+def end_phase(name: str) -> None:
+    if not MEMORY_ENABLED:
+        return
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces(_ignore_filters)
+    PHASES.append([name, snapshot, current, peak, get_memory()])
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+
+class _ProjectTracker:
+    __slots__ = ("project_script", "start")
+
+    def __init__(self, project_script: str):
+        self.project_script = project_script
+        self.start = 0
+
+    def __enter__(self):
+        self.start = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        retained = tracemalloc.get_traced_memory()[0] - self.start
+        PROJECTS[self.project_script] = PROJECTS.get(self.project_script, 0) + retained
+        return False
+
+
+# memory allocated while in this and not freed after, so what the parser and generators hold on to for a project
+def track_project(project_script: str):
+    if MEMORY_ENABLED:
+        return _ProjectTracker(project_script)
+    return nullcontext()
+
+
+def _format_site(stat) -> str:
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+
+def get_memory_report(site_count: int = TOP_SITES) -> dict:
+    phases = []
+    for index, (name, snapshot, current, peak, rss) in enumerate(PHASES):
+        phase = {"name": name, "current": current, "peak": peak, "rss": rss, "sites": []}
+        if index:
+            last_snapshot, last_current = PHASES[index - 1][1], PHASES[index - 1][2]
+            phase["delta"] = current - last_current
+            for stat in snapshot.compare_to(last_snapshot, "lineno")[:site_count]:
+                if stat.size_diff:
+                    phase["sites"].append({"site": _format_site(stat), "size_diff": stat.size_diff,
+                                           "count_diff": stat.count_diff, "size": stat.size})
+        phases.append(phase)
+
+    retained = []
+    if PHASES:
+        for stat in PHASES[-1][1].statistics("lineno")[:site_count]:
+            retained.append({"site": _format_site(stat), "size": stat.size, "count": stat.count})
+
+    return {
+        "peak_rss": get_peak_rss(),
+        "traced_peak": max((phase[3] for phase in PHASES), default=0),
+        "phases": phases,
+        "retained": retained,
+        "projects": dict(sorted(PROJECTS.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+
+def _format_size(size: int) -> str:
+    if abs(size) < 1024 * 1024:
+        return f"{size / 1024:.1f} KiB"
+    return f"{size / (1024 * 1024):.2f} MiB"
+
+
+def print_memory_report(json_path: str = "", site_count: int = TOP_SITES, project_count: int = 10) -> None:
+    if not MEMORY_ENABLED:
+        return
+
+    end_phase("after run")
+    report = get_memory_report(site_count)
+    tracemalloc.stop()
+
+    print(f"{'Memory Phase':<24} {'Traced':>12} {'Delta':>12} {'Peak':>12} {'RSS':>12}")
+    for phase in report["phases"]:
+        print(f"{phase['name']:<24} {_format_size(phase['current']):>12} {_format_size(phase.get('delta', 0)):>12} "
+              f"{_format_size(phase['peak']):>12} {_format_size(phase['rss']):>12}")
+    print(f"Peak RSS: {_format_size(report['peak_rss'])}, Peak Traced: {_format_size(report['traced_peak'])}")
+
+    for phase in report["phases"]:
+        if phase["sites"]:
+            print(f"\nTop Allocations in {phase['name']}:")
+            for site in phase["sites"]:
+                print(f"  {_format_size(site['size_diff']):>12} {site['count_diff']:>+9}  {site['site']}")
+
+    print("\nStill Allocated at the End:")
+    for site in report["retained"]:
+        print(f"  {_format_size(site['size']):>12} {site['count']:>9}  {site['site']}")
+
+    if report["projects"]:
+        print("\nMemory Kept by Projects:")
+        for project_script, size in list(report["projects"].items())[:project_count]:
+            print(f"  {_format_size(size):>12}  {project_script}")
+
+    if json_path:
+        with open(json_path, mode="w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=1)
+        print("Wrote memory profile: " + json_path)
@@ -1,14 +1,14 @@
 import os
-import glob
 import qpc_hash
+import qpc_trace
+from qpc_trace import COUNTERS
 from qpc_reader import read_file, QPCBlock, QPCBlockBase
 from qpc_args import args, get_arg_macros
-from qpc_base import Platform, Arch, check_file_path_glob
+from qpc_base import Platform, Arch, check_file_path_glob, glob_files, posix_path, posix_abs_path
 from qpc_project import ProjectContainer, ProjectPass, ProjectDefinition, ProjectGroup, BuildEvent, ConfigType, \
                         replace_macros, replace_macros_list
-from qpc_logging import warning, error, verbose, verbose_color, print_color, Color
+from qpc_logging import warning, error, verbose, verbose_color, print_color, record_warnings, replay_warnings, Color
 from enum import Enum
-from time import perf_counter
 
 
 # unused, idk if this will ever be useful either
@@ -60,10 +60,17 @@ class BaseInfoPlatform:
         self.platform = platform
         self.macros = {**get_arg_macros(), **get_platform_macros(platform)}
         
-        verbose("")
-        [verbose_color(Color.DGREEN, 'Set Macro: {0} = "{1}"'.format(name, value)) for name, value in self.macros.items()]
+        if args.verbose:
+            verbose("")
+            [verbose_color(Color.DGREEN, 'Set Macro: {0} = "{1}"'.format(name, value)) for name, value in self.macros.items()]
         
         self._projects_all = []
+        # indexes for _projects_all, each name and path -> projects with that value, by their first position in it
+        # paths are only changed through BaseInfo.set_project_path, which keeps these up to date
+        self._project_positions = {}  # project -> first position in _projects_all
+        self._projects_by_name = {}
+        self._projects_by_path = {}
+        self._projects_by_path_real = {}
         
         # this stores all everything in dependency_paths in a base file
         # and also has path fixes on it if used with a include with a path to change to
@@ -91,13 +98,45 @@ class BaseInfoPlatform:
         if not project_path:
             return
         
-        if os.path.isfile(project_path):
-            project_def.path_real = project_path
-            project_def.path = include_dir + project_path
+        if self.shared.check_path(project_path):
+            self.shared.set_project_path(project_def, include_dir + project_path, project_path)
         else:
             warning("Script does not exist: " + project_path)
 
+        self._add_project_def(project_def)
+
+    def _add_project_def(self, project_def: ProjectDefinition) -> None:
         self._projects_all.append(project_def)
+        if project_def not in self._project_positions:
+            self._project_positions[project_def] = len(self._projects_all) - 1
+            self._index_project(project_def)
+
+    def _index_project(self, project_def: ProjectDefinition) -> None:
+        position = self._project_positions[project_def]
+        for field in ("name", "path", "path_real"):
+            projects = getattr(self, "_projects_by_" + field).setdefault(getattr(project_def, field), [])
+            # almost always empty, so this doesn't need a bisect
+            index = len(projects)
+            while index and self._project_positions[projects[index - 1]] > position:
+                index -= 1
+            projects.insert(index, project_def)
+
+    def _unindex_project(self, project_def: ProjectDefinition) -> None:
+        for field in ("name", "path", "path_real"):
+            index = getattr(self, "_projects_by_" + field)
+            key = getattr(project_def, field)
+            index[key].remove(project_def)
+            if not index[key]:
+                del index[key]
+
+    # the first project in _projects_all with this name or path in any of these fields
+    def _find_project(self, key: str, *fields) -> ProjectDefinition:
+        found = None
+        for field in fields:
+            projects = getattr(self, "_projects_by_" + field).get(key)
+            if projects and (found is None or self._project_positions[projects[0]] < self._project_positions[found]):
+                found = projects[0]
+        return found
         
     def add_project_to_group(self, project_name: str, project_group: ProjectGroup, folder_list: list):
         project_def = self.get_project(project_name)
@@ -108,14 +147,16 @@ class BaseInfoPlatform:
             project_group.add_project(project_def.name, folder_list)
         else:
             project_def = ProjectDefinition(self.shared, project_name)
-            self._projects_all.append(project_def)
+            self._add_project_def(project_def)
         
     def add_project_by_script(self, project_path: str) -> bool:
         if check_file_path_glob(project_path):
-            for found_file in glob.glob(project_path):
+            found_files = glob_files(project_path)
+            qpc_hash.add_run_glob(project_path, found_files)
+            for found_file in found_files:
                 self.add_project(os.path.splitext(os.path.basename(found_file))[0], found_file)
             return True
-        elif os.path.isfile(project_path):
+        elif self.shared.check_path(project_path):
             self.add_project(os.path.splitext(os.path.basename(project_path))[0], project_path)
             return True
         # elif not self.is_project_added(project_path) and project_path not in self.shared.groups:
@@ -136,7 +177,7 @@ class BaseInfoPlatform:
 
     def add_macro(self, project_block: QPCBlock):
         value = replace_macros(project_block.values[1], self.macros)
-        verbose_color(Color.DGREEN, f"Set Macro: {project_block.values[0]} = \"{value}\"")
+        verbose_color(Color.DGREEN, lambda: f"Set Macro: {project_block.values[0]} = \"{value}\"")
         self.macros["$" + project_block.values[0]] = value
 
     def is_project_script_added(self, project_path: str) -> bool:
@@ -146,19 +187,13 @@ class BaseInfoPlatform:
         return bool(self.get_project_by_script(project_name))
 
     def get_project_by_script(self, project_path: str) -> ProjectDefinition:
-        for project in self._projects_all:
-            if project_path == project.path:
-                return project
+        return self._find_project(project_path, "path")
 
     def get_project_by_name(self, project_name: str) -> ProjectDefinition:
-        for project in self._projects_all:
-            if project.name == project_name:
-                return project
+        return self._find_project(project_name, "name")
 
     def get_project(self, project_name: str) -> ProjectDefinition:
-        for project in self._projects_all:
-            if project_name in {project.name, project.path, project.path_real}:
-                return project
+        return self._find_project(project_name, "name", "path", "path_real")
         
     def get_dependency_path(self, key: str):
         project = self.get_project(key)
@@ -167,11 +202,9 @@ class BaseInfoPlatform:
         return key
 
     def _use_project(self, project: ProjectDefinition, unwanted_projects: dict, folders: tuple = None):
+        # project_folders has every project in projects, by name
         if self.platform in project.platforms and project.name not in unwanted_projects:
-            for added_project in self.projects:
-                if added_project.name == project.name:
-                    break
-            else:
+            if project.name not in self.project_folders:
                 self.projects.append(project)
                 self.project_folders[project.name] = folders if folders else ()
         
@@ -187,13 +220,12 @@ class BaseInfoPlatform:
                         unwanted_projects[project] = None
             
             elif removed_item in self.shared.projects_all:
-                if self.shared.projects_all[removed_item] in self._projects_all:
+                if self.shared.projects_all[removed_item] in self._project_positions:
                     unwanted_projects[removed_item] = None
             else:
-                for project in self._projects_all:
-                    if removed_item == project.path:
-                        unwanted_projects[project.name] = None
-                        break
+                project = self.get_project_by_script(removed_item)
+                if project:
+                    unwanted_projects[project.name] = None
                 else:
                     warning("Project, Group, or Script does not exist: " + removed_item)
         
@@ -205,13 +237,12 @@ class BaseInfoPlatform:
                         self._use_project(self.get_project(project), unwanted_projects, folders)
                         
                 elif added_item in self.shared.projects_all:
-                    if self.shared.projects_all[added_item] in self._projects_all:
+                    if self.shared.projects_all[added_item] in self._project_positions:
                         self._use_project(self.shared.projects_all[added_item], unwanted_projects)
                 else:
-                    for project in self._projects_all:
-                        if added_item in {project.path, project.path_real}:
-                            self._use_project(project, unwanted_projects)
-                            break
+                    project = self._find_project(added_item, "path", "path_real")
+                    if project:
+                        self._use_project(project, unwanted_projects)
                     else:
                         warning("Project, Group, or Script does not exist: " + added_item)
         else:
@@ -230,15 +261,136 @@ class BaseInfo:
         self.project_hashes = {}
         self.project_dependencies = {}
         
+        # every path checked for while parsing the base files, (absolute path, is dir) -> if it existed
+        # a saved base info is only used again if these are all still the same
+        self.checked_paths = {}
+        
+    # plain data to save the base info as json, only everything from the base files, so call before finish_parsing
+    def to_data(self) -> dict:
+        project_ids = {}  # project -> position in "projects", they're shared between platforms and groups
+        for project in (*self.projects_all.values(), *[project for info in self.info_list for project in info._projects_all]):
+            project_ids.setdefault(project, len(project_ids))
+        group_ids = {group: index for index, group in enumerate(self.groups.values())}
+        
+        return {
+            "projects": [{
+                "name": project.name,
+                "path": project.path,
+                "path_real": project.path_real,
+                "platforms": [platform.name for platform in project.platforms],
+                # projects that were only in a group, and never defined, aren't in projects_all
+                "defined": self.projects_all.get(project.name) is project,
+            } for project in project_ids],
+            "groups": [{
+                "name": group.name,
+                "projects": group.projects,
+                "contains": [[group_ids[contained], group.get_contains_folder(contained)]
+                             for contained in group.get_contained_groups()],
+            } for group in group_ids],
+            "platforms": [{
+                "platform": info.platform.name,
+                "macros": info.macros,
+                "configurations": info.configurations,
+                "projects": [project_ids[project] for project in info._projects_all],
+            } for info in self.info_list],
+            "checked_paths": [[path, is_dir, exists] for (path, is_dir), exists in self.checked_paths.items()],
+        }
+    
+    # raises KeyError, IndexError, TypeError or ValueError if the data is broken
+    @classmethod
+    def from_data(cls, data: dict):
+        info = cls()
+        if [info_plat.platform.name for info_plat in info.info_list] != [item["platform"] for item in data["platforms"]]:
+            raise ValueError("saved base info is for different platforms")
+        
+        projects = []
+        for item in data["projects"]:
+            project = ProjectDefinition(info, item["name"])
+            project.path = item["path"]
+            project.path_real = item["path_real"]
+            project.platforms = {Platform[platform] for platform in item["platforms"]}
+            if item["defined"]:
+                info.projects_all[project.name] = project
+            projects.append(project)
+        
+        groups = [info.add_group(item["name"]) for item in data["groups"]]
+        for group, item in zip(groups, data["groups"]):
+            [group.add_project(name, folder_list) for name, folder_list in item["projects"].items()]
+            [group.contains_group(groups[index], folder_list) for index, folder_list in item["contains"]]
+        
+        for info_plat, item in zip(info.info_list, data["platforms"]):
+            info_plat.macros = item["macros"]
+            info_plat.configurations = item["configurations"]
+            [info_plat._add_project_def(projects[index]) for index in item["projects"]]
+        
+        info.checked_paths = {(path, is_dir): exists for path, is_dir, exists in data["checked_paths"]}
+        return info
+    
+    # project definitions are shared between platforms, so every platform using one needs the new paths indexed
+    def set_project_path(self, project_def: ProjectDefinition, path: str, path_real: str) -> None:
+        info_list = [info for info in self.info_list if project_def in info._project_positions]
+        [info._unindex_project(project_def) for info in info_list]
+        project_def.path = path
+        project_def.path_real = path_real
+        [info._index_project(project_def) for info in info_list]
+        
+    def check_path(self, path: str, is_dir: bool = False) -> bool:
+        exists = os.path.isdir(path) if is_dir else os.path.isfile(path)
+        self.checked_paths[(posix_abs_path(path), is_dir)] = exists
+        return exists
+        
+    # everything from the base files is parsed by now, this picks what to use from it with the args
     def finish_parsing(self):
         [info_plat.init_args() for info_plat in self.info_list]
         self._prepare_groups()
         self._prepare_projects()
         
+    # errors on any group containing itself, done once after parsing, so a saved base info never has one
+    def check_groups(self):
+        self._sort_groups(self.groups.values())
+        [group.clear_contains_blocks() for group in self.groups.values()]
+        
+    # only groups in --add, --add_tree, --add_depend or --remove and the groups they contain are expanded,
+    # nothing else uses them
     def _prepare_groups(self):
-        for group_name, group in self.groups.items():
+        used_groups = [self.groups[item] for item in (*args.add, *args.add_tree, *args.add_depend, *args.remove)
+                       if item in self.groups]
+        for group in self._sort_groups(used_groups):
             group.finished()
-        pass
+
+    # every group after the groups it contains, so each one is only expanded once, errors on a group containing itself
+    def _sort_groups(self, root_groups) -> list:
+        sorted_groups = []
+        visited = {}  # group -> False while the groups in it are being visited, True after
+        for root_group in root_groups:
+            if root_group in visited:
+                continue
+            visited[root_group] = False
+            stack = [(root_group, iter(root_group.get_contained_groups()))]
+            while stack:
+                group, contained_groups = stack[-1]
+                for contained_group in contained_groups:
+                    if contained_group not in visited:
+                        visited[contained_group] = False
+                        stack.append((contained_group, iter(contained_group.get_contained_groups())))
+                        break
+                    elif not visited[contained_group]:
+                        self._group_cycle_error(group, contained_group, [item[0] for item in stack])
+                else:
+                    visited[group] = True
+                    sorted_groups.append(group)
+                    stack.pop()
+        return sorted_groups
+
+    @staticmethod
+    def _group_cycle_error(group: ProjectGroup, contained_group: ProjectGroup, group_stack: list):
+        cycle = [item.name for item in group_stack[group_stack.index(contained_group):]] + [contained_group.name]
+        message = "Group contains itself: " + " -> ".join(f"\"{name}\"" for name in cycle)
+        block = group.get_contains_block(contained_group)
+        if block:
+            block.error(message)
+        else:
+            error(message)
 
     def _prepare_projects(self) -> dict:
         self.projects = {}  # dict keeps order, set doesn't as of 3.8, both faster than lists
@@ -249,11 +401,13 @@ class BaseInfo:
         
         def add_item(item_list: list, _item: str):
             if check_file_path_glob(_item):
-                item_list.extend(glob.glob(_item))
+                found_files = glob_files(_item)
+                qpc_hash.add_run_glob(_item, found_files)
+                item_list.extend(found_files)
             else:
                 item_list.append(_item)
 
-        [add_item(add_list, item) for item in args.add]
+        [add_item(add_list, item) for item in (*args.add, *self._get_dependency_closure())]
         [add_item(remove_list, item) for item in args.remove]
         [add_list.remove(item) for item in remove_list if item in add_list]
         
@@ -265,6 +419,33 @@ class BaseInfo:
                     self.projects[project] = base_info.project_folders[project.name]
         return self.projects
     
+    # the scripts of projects in --add_tree and --add_depend,
+    # and of every project that depends on them, or that they depend on, that's in the base files
+    def _get_dependency_closure(self) -> list:
+        if not args.add_tree and not args.add_depend:
+            return []
+        
+        qpc_hash.load_dependency_graph()
+        project_paths = {}  # dict keeps order
+        for items, dependents in ((args.add_tree, True), (args.add_depend, False)):
+            item_paths = [posix_path(project.path) for item in items for project in self._get_item_projects(item)]
+            project_paths.update(dict.fromkeys(qpc_hash.get_dependency_closure(item_paths, dependents)))
+        
+        return [path for path in project_paths if any(info.get_project_by_script(path) for info in self.info_list)]
+    
+    def _get_item_projects(self, item: str) -> list:
+        if item in self.groups:
+            projects = [self.projects_all.get(name) for name in self.groups[item].projects]
+            return [project for project in projects if project and project.path]
+        
+        for info in self.info_list:
+            project = info.get_project(item)
+            if project and project.path:
+                return [project]
+        
+        warning("Project, Group, or Script does not exist: " + item)
+        return []
+    
     def _add_group_project(self, name: str, proj_dict: dict, proj_type: type):
         if name in proj_dict:
             proj_obj = proj_dict[name]
@@ -345,77 +526,123 @@ class Parser:
     #  if i include the groups before the base_info, it won't add any base_info
     # def parse_base_settings(self, base_file_path: str, output_type: str, platform: Enum) -> BaseInfo:
     def parse_base_info(self, base_file_path: str) -> BaseInfo:
+        with qpc_trace.span("base parse", {"path": base_file_path}):
+            info = self._load_base_info()
+            if not info:
+                info = self._parse_base_files(base_file_path)
+            info.finish_parsing()
+        return info
+    
+    @staticmethod
+    def _load_base_info() -> BaseInfo:
+        snapshot = qpc_hash.load_base_info()
+        if not snapshot:
+            return None
+        try:
+            info = BaseInfo.from_data(snapshot["info"])
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None
+        verbose("\nBase files unchanged, using base info from last run")
+        replay_warnings(snapshot["warnings"])
+        return info
+    
+    # saved before finish_parsing, so the same base info can be used with any --add or --remove
+    def _parse_base_files(self, base_file_path: str) -> BaseInfo:
         info = BaseInfo()
-
+        input_paths = set(qpc_hash.RUN_INPUTS)
+        glob_patterns = set(qpc_hash.RUN_GLOBS)
+        # saved with the base info, so they're still printed when it's used again
+        warnings = []
+        record_warnings(warnings)
+        
         if base_file_path:
             verbose("\nReading: " + args.base_file)
 
+            qpc_hash.add_run_input(base_file_path)
             base_file = self.read_file(base_file_path)
             if not base_file:
                 warning("Base File does not exist: " + base_file_path)
             else:
                 verbose("\nParsing: " + args.base_file)
                 
-                [self._parse_base_info_recurse(info_plat, base_file) for info_plat in info.info_list]
+                self._parse_base_info_recurse(info.info_list, base_file)
 
-        info.finish_parsing()
+        info.check_groups()
+        record_warnings(None)
+        if base_file_path:
+            qpc_hash.write_base_info(info, [path for path in qpc_hash.RUN_INPUTS if path not in input_paths],
+                                     [pattern for pattern in qpc_hash.RUN_GLOBS if pattern not in glob_patterns],
+                                     warnings)
         return info
     
-    def _parse_base_info_recurse(self, info: BaseInfoPlatform, base_file: QPCBlockBase, include_dir: str = "") -> None:
+    # walks the base files once for every platform, a block is only used by the platforms its condition passes for
+    def _parse_base_info_recurse(self, info_list: list, base_file: QPCBlockBase, include_dir: str = "") -> None:
         for project_block in base_file:
-        
-            if not project_block.solve_condition(info.macros):
-                continue
-        
-            elif project_block.key == "macro":
-                info.add_macro(project_block)
-        
-            elif project_block.key == "configurations":
-                configs = project_block.get_item_list_condition(info.macros)
-                [info.configurations.append(config) for config in configs if config not in info.configurations]
-        
-            # obsolete
-            elif project_block.key == "dependency_paths":
-                project_block.warning("dependency_paths is obsolete, now uses project paths directly")
-                continue
-                
-            elif not project_block.values:
+            infos = [info for info in info_list if project_block.solve_condition(info.macros)]
+            if not infos:
                 continue
-
-            elif project_block.key == "project":
-                self._base_project_define(project_block, info, include_dir)
-
-            elif project_block.key == "group":
-                self._base_group_define(project_block, info)
-
+            
             elif project_block.key == "include":
-                # "Ah shit, here we go again."
-                file_path = os.path.normpath(replace_macros(project_block.values[0], info.macros))
-                new_include_dir = include_dir
-                
-                if len(project_block.values) >= 2:
-                    new_include_dir += "/" + project_block.values[1] if include_dir else project_block.values[1]
-                    new_include_dir = replace_macros(new_include_dir, info.macros)
-                    current_dir = os.getcwd()
-                    if os.path.isdir(new_include_dir):
-                        os.chdir(new_include_dir)
-                
-                verbose("Reading: " + file_path)
+                if project_block.values:
+                    self._base_include(project_block, infos, include_dir)
             
-                try:
-                    include_file = read_file(file_path)
+            else:
+                [self._parse_base_info_block(info, project_block, include_dir) for info in infos]
+    
+    def _parse_base_info_block(self, info: BaseInfoPlatform, project_block: QPCBlock, include_dir: str) -> None:
+        if project_block.key == "macro":
+            info.add_macro(project_block)
+    
+        elif project_block.key == "configurations":
+            configs = project_block.get_item_list_condition(info.macros)
+            [info.configurations.append(config) for config in configs if config not in info.configurations]
+    
+        # obsolete
+        elif project_block.key == "dependency_paths":
+            project_block.warning("dependency_paths is obsolete, now uses project paths directly")
             
-                    verbose("Parsing... ")
-                
-                    self._parse_base_info_recurse(info, include_file, new_include_dir)
-                except FileNotFoundError:
-                    project_block.warning("File Does Not Exist: ")
-                    
-                if len(project_block.values) >= 2:
-                    os.chdir(current_dir)
+        elif not project_block.values:
+            return
 
-            elif not args.hide_warnings:
-                project_block.warning("Unknown Key: ")
+        elif project_block.key == "project":
+            self._base_project_define(project_block, info, include_dir)
+
+        elif project_block.key == "group":
+            self._base_group_define(project_block, info)
+
+        elif not args.hide_warnings:
+            project_block.warning("Unknown Key: ")
+
+    def _base_include(self, project_block: QPCBlock, info_list: list, include_dir: str) -> None:
+        # "Ah shit, here we go again."
+        # platforms can include different files with macros, each file is parsed once for the platforms including it
+        includes = {}
+        for info in info_list:
+            file_path = os.path.normpath(replace_macros(project_block.values[0], info.macros))
+            new_include_dir = include_dir
+            if len(project_block.values) >= 2:
+                new_include_dir += "/" + project_block.values[1] if include_dir else project_block.values[1]
+                new_include_dir = replace_macros(new_include_dir, info.macros)
+            includes.setdefault((file_path, new_include_dir), []).append(info)
+        
+        for (file_path, new_include_dir), include_infos in includes.items():
+            if len(project_block.values) >= 2:
+                current_dir = os.getcwd()
+                if include_infos[0].shared.check_path(new_include_dir, True):
+                    os.chdir(new_include_dir)
+            
+            verbose("Reading: " + file_path)
+            qpc_hash.add_run_input(file_path)
+            include_file = self.read_file(file_path)
+            
+            if include_file is None:
+                project_block.warning("File Does Not Exist: ")
+            else:
+                verbose("Parsing... ")
+                self._parse_base_info_recurse(include_infos, include_file, new_include_dir)
+                
+            if len(project_block.values) >= 2:
+                os.chdir(current_dir)
             
     def _base_group_define(self, group_block: QPCBlock, info: BaseInfoPlatform):
         if not group_block.values:
@@ -428,7 +655,7 @@ class Parser:
         
         for contain_group_name in group_block.values[1:]:
             contain_group = info.shared.add_group(contain_group_name)
-            contain_group.contains_group(project_group, [])
+            contain_group.contains_group(project_group, [], group_block)
             
     @staticmethod
     def _base_project_define(block: QPCBlock, info: BaseInfoPlatform, include_dir: str = ""):
@@ -455,16 +682,14 @@ class Parser:
                         contain_group = info.shared.groups[group_name]
                     else:
                         contain_group = info.shared.add_group(group_name)
-                    project_group.contains_group(contain_group, folder_list)
+                    project_group.contains_group(contain_group, folder_list, item)
                         
             else:
                 info.add_project_to_group(item.key, project_group, folder_list)
                 # project_group.add_project(item.key, folder_list, info.shared.unsorted_projects)
     
     def parse_project(self, project_def: ProjectDefinition, project_script: str, info: BaseInfo, generator_list: list) -> ProjectContainer:
-        if args.time:
-            start_time = perf_counter()
-        elif not args.verbose:
+        if not args.verbose:
             print("Parsing: " + project_script)
 
         project_filename = os.path.split(project_script)[1]
@@ -478,15 +703,18 @@ class Parser:
         project_container = ProjectContainer(project_name, project_script, info, project_def, generator_list)
         
         for project_pass in project_container._passes:
-            verbose(f"\n ---- Parsing Project - "
-                    f"Config: \"{project_pass.config_name}\" "
-                    f"Platform: \"{project_pass.platform.name}\" "
-                    f"Arch: \"{project_pass.arch.name}\" ---- \n")
-
-            verbose("Parsing: " + project_script)
-            project_pass.hash_list[project_filename] = qpc_hash.make_hash(project_filename)
-            self._parse_project(project_block, project_pass, project_script)
+            verbose(lambda: f"\n ---- Parsing Project - "
+                            f"Config: \"{project_pass.config_name}\" "
+                            f"Platform: \"{project_pass.platform.name}\" "
+                            f"Arch: \"{project_pass.arch.name}\" ---- \n")
+
+            verbose("Parsing: ", project_script)
+            with qpc_trace.span("pass", {"config": project_pass.config_name, "platform": project_pass.platform.name,
+                                         "arch": project_pass.arch.name}):
+                project_pass.hash_list[project_filename] = qpc_hash.make_hash(project_filename)
+                self._parse_project(project_block, project_pass, project_script)
             self.counter += 1
+            COUNTERS["passes_parsed"] += 1
             
             if project_pass.config.general.configuration_type is None:
                 error("No configuration_type Specified in Script!",
@@ -494,9 +722,6 @@ class Parser:
                       " ".join([f"\"{enum.name.lower()}\"" for enum in ConfigType]))
     
         verbose("Parsed: " + project_container.get_display_name())
-
-        if args.time:
-            print(str(round(perf_counter() - start_time, 4)) + " - Parsed: " + project_script)
             
         return project_container
     
@@ -534,17 +759,18 @@ class Parser:
                 elif project_block.key == "include":
                     # Ah shit, here we go again.
                     include_path = project.replace_macros(project_block.values[0])
-                    include_file = self._include_file(include_path, project, indent + "    ")
-                    if include_file:
-                        try:
-                            self._parse_project(include_file, project, include_path, indent + "    ")
-                            # reset the script macros back to the values for this script
-                            set_script_macros()
-                        except RecursionError:
-                            raise RecursionError("Recursive Includes found:\n" + project_block.get_formatted_info())
-                        verbose(indent + "    " + "Finished Parsing")
-                    else:
-                        project_block.warning(f"File does not exist: {include_path}")
+                    with qpc_trace.span("include", {"path": include_path}):
+                        include_file = self._include_file(include_path, project, indent + "    ")
+                        if include_file:
+                            try:
+                                self._parse_project(include_file, project, include_path, indent + "    ")
+                                # reset the script macros back to the values for this script
+                                set_script_macros()
+                            except RecursionError:
+                                raise RecursionError("Recursive Includes found:\n" + project_block.get_formatted_info())
+                            verbose(indent, "    Finished Parsing")
+                        else:
+                            project_block.warning(f"File does not exist: {include_path}")
                     
                 else:
                     project_block.warning("Unknown key: ")
@@ -556,7 +782,7 @@ class Parser:
         if not include_file:
             return None
     
-        verbose(indent + "Parsing: " + include_path)
+        verbose(indent, "Parsing: ", include_path)
     
         return include_file
         
@@ -597,7 +823,7 @@ class Parser:
                     if block.items:
                         for file_path in block.get_list():
                             if check_file_path_glob(file_path):
-                                [self._source_file(block, project, found_file) for found_file in glob.glob(file_path)]
+                                [self._source_file(block, project, found_file) for found_file in glob_files(file_path)]
                             else:
                                 self._source_file(block, project, file_path)
                        
@@ -619,18 +845,20 @@ class Parser:
                         if group_block.solve_condition(project.macros):
                             for option_block in group_block.items:
                                 if option_block.solve_condition(project.macros):
-                                    source_file.compiler.parse_option(project.macros, option_block)
+                                    source_file.get_compiler_for_edit().parse_option(project.macros, option_block)
                 else:
                     # new, cleaner way, just assume it's compiler
-                    source_file.compiler.parse_option(project.macros, config_block)
+                    source_file.get_compiler_for_edit().parse_option(project.macros, config_block)
 
+    # cached by absolute path, the same relative path can be a different file in another directory
     def read_file(self, script_path: str) -> QPCBlockBase:
-        if script_path in self.read_files:
-            return self.read_files[script_path]
+        abs_path = posix_abs_path(script_path)
+        if abs_path in self.read_files:
+            return self.read_files[abs_path]
         else:
             try:
                 script = read_file(script_path)
-                self.read_files[script_path] = script
+                self.read_files[abs_path] = script
                 return script
             except FileNotFoundError:
                 pass
@@ -0,0 +1,153 @@
+# ==================================================================================================
+# Startup Profiler
+# times each startup phase and module import, with how much memory the process was using after it
+# this has to be imported before anything else in qpc.py, and can't import any other qpc module
+# ==================================================================================================
+
+import os
+import sys
+import json
+import builtins
+from time import perf_counter
+from contextlib import contextmanager
+
+
+START_TIME = perf_counter()
+
+# checked before arguments are parsed, since most of the imports happen before that
+PROFILE_STARTUP = any(arg == "--profile-startup" or arg.startswith("--profile-startup=") for arg in sys.argv[1:])
+
+PHASES = []  # [name, depth, start, end, memory]
+IMPORTS = []  # [name, depth, start, end, memory, self time]
+
+_phase_stack = []
+_import_stack = []  # time spent in imports nested in each import on the stack
+_original_import = builtins.__import__
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 0
+
+
+# resident memory in bytes, or the peak if we can't get the current value on this os
+def get_memory() -> int:
+    if _PAGE_SIZE:
+        try:
+            with open("/proc/self/statm", "rb") as statm:
+                return int(statm.read().split()[1]) * _PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            pass
+    try:
+        import resource
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+    except ImportError:
+        return 0
+
+
+def _profile_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # already imported, nothing to time
+    if level == 0 and not fromlist and name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    module_count = len(sys.modules)
+    _import_stack.append(0.0)
+    start = perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        end = perf_counter()
+        child_time = _import_stack.pop()
+        # only record it if it actually imported something
+        if len(sys.modules) != module_count:
+            if _import_stack:
+                _import_stack[-1] += end - start
+            IMPORTS.append([_get_import_name(name, globals, level), len(_import_stack), start, end, get_memory(),
+                            end - start - child_time])
+
+
+def _get_import_name(name: str, globals: dict, level: int) -> str:
+    if not level or not globals:
+        return name
+    package = globals.get("__package__") or ""
+    if level > 1:
+        package = package.rsplit(".", level - 1)[0]
+    return f"{package}.{name}" if name else package
+
+
+def start() -> None:
+    if PROFILE_STARTUP:
+        builtins.__import__ = _profile_import
+        begin_phase("imports")
+
+
+def _stop_import_profiling() -> None:
+    if builtins.__import__ is _profile_import:
+        builtins.__import__ = _original_import
+
+
+# for code that can't be put in a with block, like imports
+def begin_phase(name: str) -> None:
+    if PROFILE_STARTUP:
+        _phase_stack.append([name, len(_phase_stack), perf_counter(), 0.0, 0])
+        PHASES.append(_phase_stack[-1])
+
+
+def end_phase() -> None:
+    if PROFILE_STARTUP:
+        entry = _phase_stack.pop()
+        entry[3] = perf_counter()
+        entry[4] = get_memory()
+
+
+@contextmanager
+def phase(name: str):
+    begin_phase(name)
+    try:
+        yield
+    finally:
+        end_phase()
+
+
+def get_startup_report() -> dict:
+    end = perf_counter()
+    return {
+        "total": end - START_TIME,
+        "memory": get_memory(),
+        "phases": [{"name": name, "depth": depth, "start": start - START_TIME, "time": phase_end - start,
+                    "memory": memory} for name, depth, start, phase_end, memory in PHASES],
+        "imports": [{"name": name, "depth": depth, "start": start - START_TIME, "time": import_end - start,
+                     "self": self_time, "memory": memory}
+                    for name, depth, start, import_end, memory, self_time in IMPORTS],
+    }
+
+
+def _format_row(name: str, time: float, memory: int, self_time: str = "") -> str:
+    return f"{name:<52} {time * 1000:>9.2f} {self_time:>9} {memory / (1024 * 1024):>9.1f}"
+
+
+# prints a table of the startup phases and the slowest imports, and writes all of it as json if json_path is set
+def print_startup_report(json_path: str = "", file=None, import_count: int = 25) -> None:
+    if not PROFILE_STARTUP:
+        return
+
+    _stop_import_profiling()
+    report = get_startup_report()
+    file = file or sys.stdout
+
+    print(f"{'Startup Phase':<52} {'Time ms':>9} {'':>9} {'Mem MiB':>9}", file=file)
+    for item in report["phases"]:
+        print(_format_row("  " * item["depth"] + item["name"], item["time"], item["memory"]), file=file)
+    print(_format_row("Total", report["total"], report["memory"]), file=file)
+
+    print(f"\n{'Slowest Imports':<52} {'Time ms':>9} {'Self ms':>9} {'Mem MiB':>9}", file=file)
+    for item in sorted(report["imports"], key=lambda _item: _item["self"], reverse=True)[:import_count]:
+        print(_format_row("  " * item["depth"] + item["name"], item["time"], item["memory"],
+                          f"{item['self'] * 1000:.2f}"), file=file)
+    print(f"{len(report['imports'])} modules imported", file=file)
+
+    if json_path:
+        with open(json_path, mode="w", encoding="utf-8") as json_file:
+            json.dump(report, json_file, indent=1)
+        print("Wrote startup profile: " + json_path, file=file)
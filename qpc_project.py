@@ -5,11 +5,11 @@
 # it would probably slow it down as well
 
 import os
-import glob
 import qpc_hash
 from qpc_reader import solve_condition, read_file, QPCBlock
 from qpc_args import args, get_arg_macros
-from qpc_base import posix_path, norm_path, Platform, Arch, PLATFORM_ARCHS, check_file_path_glob
+from qpc_trace import COUNTERS
+from qpc_base import posix_path, norm_path, Platform, Arch, PLATFORM_ARCHS, check_file_path_glob, glob_files
 from qpc_logging import warning, error, verbose, verbose_color, print_color, Color
 from enum import EnumMeta, Enum, auto
 from time import perf_counter
@@ -81,25 +81,189 @@ class ProjectGroup(BaseInfoProject):
         # dict keeps order, set doesn't as of 3.8, both faster than lists
         self.projects = dict()
         self._contains = dict()
+        self._contains_blocks = dict()  # group -> block that added it, for errors
+        self._finished = False
 
     def add_project(self, project_name: str, folder_list: List[str]) -> None:
         self.projects[project_name] = tuple(folder_list)
 
     # group: ProjectGroup
-    def contains_group(self, group, folder_list: List[str]):
+    def contains_group(self, group, folder_list: List[str], block: QPCBlock = None):
         self._contains[group] = folder_list.copy()
+        if block is not None:
+            self._contains_blocks[group] = block
+
+    def get_contained_groups(self) -> list:
+        return list(self._contains)
+
+    def get_contains_folder(self, group) -> List[str]:
+        return self._contains[group]
+
+    def get_contains_block(self, group) -> QPCBlock:
+        return self._contains_blocks.get(group)
             
+    # only expands once, BaseInfo finishes groups in an order where contained groups are always finished first
     def finished(self):
+        if self._finished:
+            return
+        self._finished = True
         for group, group_folder in self._contains.items():
             group.finished()
             for project, folder in group.projects.items():
                 self.add_project(project, [*group_folder, *folder])
 
+    # the blocks are only for errors while parsing, and shouldn't be saved with the base info
+    def clear_contains_blocks(self):
+        self._contains_blocks.clear()
+
 
 class SourceFile:
-    def __init__(self, folder_list: list):
-        self.folder = "/".join(folder_list)
-        self.compiler = SourceFileCompile()
+    __slots__ = ("folder", "compiler")
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        # most files don't set any options, so they all share one empty compiler until they do
+        self.compiler = EMPTY_SOURCE_FILE_COMPILE
+
+    def get_compiler_for_edit(self) -> "SourceFileCompile":
+        if self.compiler is EMPTY_SOURCE_FILE_COMPILE:
+            self.compiler = SourceFileCompile()
+        return self.compiler
+
+
+# every file path in a project, shared by all passes, each pass keeps a bitset of the files it has
+# so generators can merge and compare passes with int operations instead of a dict lookup for each file and pass
+class FileTable:
+    __slots__ = ("paths", "_indexes")
+
+    def __init__(self):
+        self.paths: List[str] = []  # index -> path, None if no pass has it anymore
+        self._indexes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._indexes
+
+    def add(self, file_path: str) -> int:
+        index = self._indexes.get(file_path)
+        if index is None:
+            index = self._indexes[file_path] = len(self.paths)
+            self.paths.append(file_path)
+        return index
+
+    def get_index(self, file_path: str) -> int:
+        return self._indexes.get(file_path, -1)
+
+    # files removed from every pass get a new index if they are added again,
+    # so the table stays in the same order as the pass dicts
+    def remove(self, file_path: str) -> None:
+        index = self._indexes.pop(file_path, None)
+        if index is not None:
+            self.paths[index] = None
+
+    # paths of every set bit, in the order they were added
+    def get_paths(self, mask: int) -> List[str]:
+        paths = self.paths
+        return [paths[index] for index, bit in enumerate(bin(mask)[:1:-1]) if bit == "1"]
+
+    def get_mask(self, file_paths) -> int:
+        mask = 0
+        for file_path in file_paths:
+            index = self._indexes.get(file_path)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    # files with one of these extensions, not case sensitive
+    def get_ext_mask(self, exts) -> int:
+        if not self.paths:
+            return 0
+        bits = ["1" if path is not None and os.path.splitext(path)[1].casefold() in exts else "0"
+                for path in reversed(self.paths)]
+        return int("".join(bits), 2)
+
+
+class _FolderNode:
+    __slots__ = ("name", "path", "parent", "children", "files", "count")
+
+    def __init__(self, name: str, parent):
+        self.name = name
+        self.path = parent.path + "/" + name if parent is not None and parent.parent is not None else name
+        self.parent: _FolderNode = parent
+        self.children: Dict[str, _FolderNode] = {}
+        self.files: Dict[str, int] = {}  # file path -> how many times it was added
+        self.count = 0  # files added to this folder and every folder in it
+
+
+# folders in a project and the files in each, split once when a file is added instead of each time they are listed
+# listing folders or the files in one only takes as long as what it returns
+class FolderTrie:
+    __slots__ = ("root",)
+
+    def __init__(self):
+        self.root = _FolderNode("", None)
+
+    # returns the full folder path, shared by every file in it
+    def add(self, folder_list: list, file_path: str) -> str:
+        node = self.root
+        node.count += 1
+        for name in folder_list:
+            child = node.children.get(name)
+            if child is None:
+                child = node.children[name] = _FolderNode(name, node)
+            node = child
+            node.count += 1
+        node.files[file_path] = node.files.get(file_path, 0) + 1
+        return node.path
+
+    def remove(self, folder_list: list, file_path: str) -> None:
+        node = self.get_node(folder_list)
+        if node is None or file_path not in node.files:
+            return
+        if node.files[file_path] > 1:
+            node.files[file_path] -= 1
+        else:
+            del node.files[file_path]
+        while node is not None:
+            node.count -= 1
+            if not node.count and node.parent is not None:
+                del node.parent.children[node.name]
+            node = node.parent
+
+    def get_node(self, folder_list: list) -> _FolderNode:
+        node = self.root
+        for name in folder_list:
+            node = node.children.get(name)
+            if node is None:
+                return None
+        return node
+
+    # every folder and the folders above them, parents first
+    # skip_empty leaves out paths that start with an empty folder name, like "/folder"
+    def get_folders(self, sep: str = "/", skip_empty: bool = False) -> List[str]:
+        folders = []
+        stack = [(node, node.name) for node in reversed(self.root.children.values()) if node.name or not skip_empty]
+        while stack:
+            node, path = stack.pop()
+            folders.append(path)
+            stack.extend((child, path + sep + child.name) for child in reversed(node.children.values()))
+        return folders
+
+    def get_files(self, folder_list: list, recursive: bool = False) -> List[str]:
+        node = self.get_node(folder_list)
+        if node is None:
+            return []
+        if not recursive:
+            return list(node.files)
+        files = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            files.extend(node.files)
+            stack.extend(reversed(node.children.values()))
+        return files
 
 
 class ProjectPass:
@@ -114,6 +278,9 @@ class ProjectPass:
         self.config: Configuration = Configuration(self)
         self.source_files: Dict[str, SourceFile] = {}
         self.files: Dict[str, str] = {}
+        # bitsets of container.file_table
+        self.source_file_mask = 0
+        self.file_mask = 0
         self.hash_list: Dict[str, str] = {}
         self._glob_files: set = set()
         self.build_events: Dict[str, BuildEvent] = {}
@@ -158,7 +325,7 @@ class ProjectPass:
             
     def _set_macro(self, indent: str, macro_name: str, macro_value: str = ""):
         self.macros[macro_name] = macro_value
-        verbose_color(Color.DGREEN, f"{indent}    Set Macro: {macro_name} = \"{self.macros[macro_name]}\"")
+        verbose_color(Color.DGREEN, lambda: f"{indent}    Set Macro: {macro_name} = \"{macro_value}\"")
         self._replace_undefined_macros(indent)
 
     def _replace_undefined_macros(self, indent: str) -> None:
@@ -199,20 +366,24 @@ class ProjectPass:
 
     def _add_file_glob(self, folder_list: list, file_path: str, file_block: QPCBlock) -> None:
         self._glob_files.add(file_path)
-        [self._add_file_internal(folder_list, found_file, file_block) for found_file in glob.glob(file_path)]
+        [self._add_file_internal(folder_list, found_file, file_block) for found_file in glob_files(file_path)]
 
     def _remove_file_glob(self, folder_list: list, file_path: str, file_block: QPCBlock) -> None:
         self._glob_files.add(file_path)
-        [self._remove_file_internal(folder_list, found_file, file_block) for found_file in glob.glob(file_path)]
+        [self._remove_file_internal(folder_list, found_file, file_block) for found_file in glob_files(file_path)]
 
     def _add_file_internal(self, folder_list: list, file_path: str, file_block: QPCBlock):
         build = file_block.get_item("build")
         force_src_file = build and build.solve_condition(self.macros) and build.values and build.values[0] == "true"
         if force_src_file or os.path.splitext(file_path)[1] in EXTS_C:
             if not self._check_file_added(file_path, file_block, self.source_files):
-                self.source_files[file_path] = SourceFile(folder_list)
+                file_path, folder = self.container.add_file(folder_list, file_path)
+                self.source_files[file_path] = SourceFile(folder)
+                self.source_file_mask |= 1 << self.container.file_table.get_index(file_path)
         elif not self._check_file_added(file_path, file_block, self.files):
-            self.files[file_path] = "/".join(folder_list)
+            file_path, folder = self.container.add_file(folder_list, file_path)
+            self.files[file_path] = folder
+            self.file_mask |= 1 << self.container.file_table.get_index(file_path)
 
     @staticmethod
     def _check_file_added(file_path: str, file_block: QPCBlock, file_dict: dict) -> bool:
@@ -225,12 +396,16 @@ class ProjectPass:
     def _remove_file_internal(self, folder_list: list, file_path: str, file_block: QPCBlock):
         if os.path.splitext(file_path)[1] in EXTS_C:
             if file_path in self.source_files:
-                del self.source_files[file_path]
+                folder = self.source_files.pop(file_path).folder
+                self.source_file_mask &= ~(1 << self.container.file_table.get_index(file_path))
+                self.container.remove_file(folder, file_path)
             else:
                 file_block.warning(f"Trying to remove a file that isn't added: \"{file_path}\"")
         else:
             if file_path in self.files:
-                del self.files[file_path]
+                folder = self.files.pop(file_path)
+                self.file_mask &= ~(1 << self.container.file_table.get_index(file_path))
+                self.container.remove_file(folder, file_path)
             else:
                 file_block.warning(f"Trying to remove a file that isn't added: \"{file_path}\"")
 
@@ -265,7 +440,7 @@ class ProjectPass:
                     if block.items:
                         for file_path in block.get_list():
                             if check_file_path_glob(file_path):
-                                [self.parse_source_file(block, found_file) for found_file in glob.glob(file_path)]
+                                [self.parse_source_file(block, found_file) for found_file in glob_files(file_path)]
                             else:
                                 self.parse_source_file(block, file_path)
 
@@ -286,57 +461,16 @@ class ProjectPass:
                         if group_block.solve_condition(self.macros):
                             for option_block in group_block.items:
                                 if option_block.solve_condition(self.macros):
-                                    source_file.compiler.parse_option(self.macros, option_block)
+                                    source_file.get_compiler_for_edit().parse_option(self.macros, option_block)
                 else:
                     # new, cleaner way, just assume it's compiler
-                    source_file.compiler.parse_option(self.macros, config_block)
+                    source_file.get_compiler_for_edit().parse_option(self.macros, config_block)
         
     def is_build_event_defined(self, name: str):
         return name in self.build_events
     
     # below is stuff for generators to use
     
-    # Gets every single folder in the project, splitting each one as well
-    # this function is awful
-    def get_editor_folders(self, sep: str = "/") -> set:
-        folder_paths = set()
-        # TODO: is there a better way to do this?
-        [folder_paths.add(file_path) for file_path in self.files.values()]
-        [folder_paths.add(sf.folder) for sf in self.source_files.values()]
-        
-        full_folder_paths = set()
-        # split every single folder because visual studio bad
-        for folder_path in folder_paths:
-            current_path = list(folder_path.split("/"))
-            if not current_path or not current_path[0]:
-                continue
-            folder_list = [current_path[0]]
-            del current_path[0]
-            for folder in current_path:
-                folder_list.append(folder_list[-1] + sep + folder)
-            full_folder_paths.update(folder_list)
-        
-        return full_folder_paths
-    
-    def get_folders(self) -> set:
-        folder_paths = split_folders(self.files)
-        folder_paths.update(split_folders(self.source_files))
-        return folder_paths
-    
-    def get_files_in_folder(self, folder_path: str) -> list:
-        file_list = []
-        
-        # maybe change to startswith, so you can get stuff in nested folders as well?
-        for file_path, file_folder in self.files.items():
-            if file_folder == folder_path:
-                file_list.append(file_path)
-        
-        for file_path, file_folder in self.source_files.items():
-            if file_folder == folder_path:
-                file_list.append(file_path)
-        
-        return file_list
-    
     def get_file_folder(self, file_path) -> str:
         file_path = self.replace_macros(file_path)
         if file_path in self.files:
@@ -380,6 +514,10 @@ class ProjectContainer:
             **get_arg_macros()
         }
         
+        self.file_table = FileTable()
+        self.editor_folders = FolderTrie()  # the folders files are put in with "folder" in scripts
+        self.file_folders = FolderTrie()  # the folders files are in on disk
+        self._value_keys: Dict[str, int] = {}
         self._passes: List[ProjectPass] = []
         generator_macros = {}
         for generator in generator_list:
@@ -454,15 +592,16 @@ class ProjectContainer:
         map(self.remove_dependency, qpc_paths)
         # [self.remove_dependency(qpc_path) for qpc_path in qpc_paths]
     
-    def get_editor_folders(self, sep: str = "/") -> set:
-        folder_paths = set()
-        [folder_paths.update(project.get_editor_folders(sep)) for project in self._passes]
-        return folder_paths
+    # parents first, in the order they were added
+    def get_editor_folders(self, sep: str = "/") -> List[str]:
+        return self.editor_folders.get_folders(sep, True)
     
-    def get_folders(self) -> set:
-        folder_paths = set()
-        [folder_paths.update(project.get_folders()) for project in self._passes]
-        return folder_paths
+    def get_folders(self) -> List[str]:
+        return self.file_folders.get_folders()
+
+    # files in an editor folder from any pass, and files in the folders inside it if recursive
+    def get_files_in_folder(self, folder_path: str, recursive: bool = False) -> list:
+        return self.editor_folders.get_files(folder_path.split("/") if folder_path else [], recursive)
 
     def get_display_name(self) -> str:
         return self._passes[0].macros["$PROJECT_NAME"]
@@ -491,8 +630,61 @@ class ProjectContainer:
         [all_files.update(project.files) for project in self._passes]
         return all_files
 
+    # ----------------------------------------------------------------------------------------------
+    # file table, source=True for source_files, source=False for files, None for both
+
+    @staticmethod
+    def get_pass_mask(project_pass: ProjectPass, source: bool = None) -> int:
+        if source is None:
+            return project_pass.source_file_mask | project_pass.file_mask
+        return project_pass.source_file_mask if source else project_pass.file_mask
+
+    def get_any_pass_mask(self, passes: List[ProjectPass] = None, source: bool = None) -> int:
+        mask = 0
+        for project_pass in self._passes if passes is None else passes:
+            mask |= self.get_pass_mask(project_pass, source)
+        return mask
+
+    def get_all_passes_mask(self, passes: List[ProjectPass] = None, source: bool = None) -> int:
+        passes = self._passes if passes is None else passes
+        if not passes:
+            return 0
+        mask = -1
+        for project_pass in passes:
+            mask &= self.get_pass_mask(project_pass, source)
+        return mask
+
+    # called when a pass adds a file, returns the file path and folder to use, shared with the other passes
+    def add_file(self, folder_list: list, file_path: str) -> tuple:
+        if file_path not in self.file_table:
+            self.file_folders.add(os.path.split(file_path)[0].split("/"), file_path)
+        file_path = self.file_table.paths[self.file_table.add(file_path)]
+        # folder names can have slashes in them too
+        folder = "/".join(folder_list)
+        return file_path, self.editor_folders.add(folder.split("/") if folder else [], file_path)
+
+    # called after a pass removes a file, drops it from the table if no other pass has it
+    def remove_file(self, folder: str, file_path: str) -> None:
+        self.editor_folders.remove(folder.split("/") if folder else [], file_path)
+        index = self.file_table.get_index(file_path)
+        if index != -1 and not self.get_any_pass_mask() >> index & 1:
+            self.file_table.remove(file_path)
+            self.file_folders.remove(os.path.split(file_path)[0].split("/"), file_path)
+
+    # ----------------------------------------------------------------------------------------------
+    # interned config values, passes that resolve to the same settings get the same key
+    # these are worked out each time, since generators can still change the config (vstudio removes MBCS)
+
+    def get_value_key(self, value) -> int:
+        return self._value_keys.setdefault(qpc_hash.get_structural_key(value), len(self._value_keys))
+
+    def get_config_key(self, project_pass: ProjectPass, *groups) -> tuple:
+        return tuple(self.get_value_key(getattr(project_pass.config, group)) for group in groups)
+
 
 class Configuration:
+    __slots__ = ("_proj", "_name", "debug", "general", "compiler", "linker", "pre_build", "pre_link", "post_build")
+
     def __init__(self, project: ProjectPass):
         self._proj: ProjectPass = project
         self._name: str = project.config_name
@@ -515,13 +707,13 @@ class Configuration:
         if value:
             # TODO: improve this, what if \\n is used in the file? it would just become \ and then new line, awful
             value = value.replace("\\n", "\n")
-            self.__dict__[group_block.key].append(value)
+            getattr(self, group_block.key).append(value)
 
     def parse_config_option(self, group: QPCBlock, option: QPCBlock):
         if self.check_build_step(group):
-            self.parse_build_step(self.__dict__[group.key], option)
-        elif group.key in self.__dict__ and group.key != "_proj":
-            self.__dict__[group.key].parse_option(self._proj.macros, option)
+            self.parse_build_step(getattr(self, group.key), option)
+        elif group.key in {"debug", "general", "compiler", "linker"}:
+            getattr(self, group.key).parse_option(self._proj.macros, option)
         else:
             group.warning("Unknown Configuration Group: ")
             
@@ -533,7 +725,7 @@ class Configuration:
         event_args = replace_macros_list(self._proj.macros, *arg_list)
         for index, event_macro in enumerate(event_args):
             if check_file_path_glob(event_macro):
-                files = glob.glob(event_macro, recursive=True)
+                files = glob_files(event_macro, recursive=True)
                 [self._parse_build_step_call(step, event, file) for file in files]
             else:
                 self._parse_build_step_call(step, event, event_macro)
@@ -571,20 +763,22 @@ class Configuration:
 
 # idea, for debug options in the editor used (if it can debug)
 class Debug:
+    __slots__ = ("command", "arguments", "working_dir")
+
     def __init__(self):
         self.command = ""
         self.arguments = ""
         self.working_dir = ""
         
     def __bool__(self) -> bool:
-        return any(self.__dict__.values())
+        return any(getattr(self, name) for name in self.__slots__)
 
     def parse_option(self, macros: dict, option_block: QPCBlock) -> None:
         if option_block.values:
             if option_block.key == "arguments":
                 self.arguments = replace_macros(option_block.values[0], macros)
-            elif option_block.key in self.__dict__:
-                self.__dict__[option_block.key] = clean_path(option_block.values[0], macros)
+            elif option_block.key in self.__slots__:
+                setattr(self, option_block.key, clean_path(option_block.values[0], macros))
             else:
                 option_block.warning("Invalid Debug Option: ")
 
@@ -594,6 +788,10 @@ def clean_path(string: str, macros: dict) -> str:
 
 
 class General:
+    __slots__ = ("_config", "out_dir", "build_dir", "out_name", "configuration_type", "language", "standard", "compiler",
+                 "default_include_directories", "default_library_directories", "include_directories",
+                 "library_directories", "options")
+
     def __init__(self, config: Configuration, file_name: str, platform: Platform):
         self._config: Configuration = config
         # add the arch here
@@ -623,7 +821,7 @@ class General:
         # multiple path options
         if option_block.key in {"include_directories", "library_directories", "options"}:
             for item in option_block.get_items_cond(macros):
-                self.__dict__[option_block.key].extend(replace_macros_list(macros, *item.get_list()))
+                getattr(self, option_block.key).extend(replace_macros_list(macros, *item.get_list()))
 
         elif option_block.key == "options":
             for item in option_block.get_items_cond(macros):
@@ -643,7 +841,7 @@ class General:
             self.out_name = replace_macros(option_block.values[0], macros)
         
         elif option_block.key in {"default_include_directories", "default_library_directories"}:
-            self.__dict__[option_block.key] = convert_bool_option(self.__dict__[option_block.key], option_block)
+            setattr(self, option_block.key, convert_bool_option(getattr(self, option_block.key), option_block))
             
         elif option_block.key == "configuration_type":
             self.set_type(option_block)
@@ -685,6 +883,9 @@ class General:
 
 
 class Compile:
+    __slots__ = ("preprocessor_definitions", "precompiled_header", "precompiled_header_file",
+                 "precompiled_header_output_file", "options")
+
     def __init__(self):
         self.preprocessor_definitions: list = []
         self.precompiled_header: PrecompiledHeader = None  # PrecompiledHeader.NONE
@@ -695,20 +896,22 @@ class Compile:
     def parse_option(self, macros: dict, option_block: QPCBlock) -> None:
         if option_block.key in ("preprocessor_definitions", "options"):
             for item in option_block.get_items_cond(macros):
-                self.__dict__[option_block.key].extend(replace_macros_list(macros, *item.get_list()))
+                getattr(self, option_block.key).extend(replace_macros_list(macros, *item.get_list()))
     
         elif option_block.key == "precompiled_header":
             if option_block.values:
                 self.precompiled_header = convert_enum_option(self.precompiled_header, option_block, PrecompiledHeader)
     
         elif option_block.key in {"precompiled_header_file", "precompiled_header_output_file"}:
-            self.__dict__[option_block.key] = replace_macros(option_block.values[0], macros)
+            setattr(self, option_block.key, replace_macros(option_block.values[0], macros))
     
         else:
             option_block.error("Unknown Compiler Option: ")
     
     
 class SourceFileCompile(Compile):
+    __slots__ = ("build",)
+
     def __init__(self):
         super().__init__()
         self.build = True
@@ -720,7 +923,16 @@ class SourceFileCompile(Compile):
             super().parse_option(macros, option_block)
 
 
+# shared by every source file without options of its own, the lists are tuples so nothing can be added to them
+EMPTY_SOURCE_FILE_COMPILE = SourceFileCompile()
+EMPTY_SOURCE_FILE_COMPILE.preprocessor_definitions = ()
+EMPTY_SOURCE_FILE_COMPILE.options = ()
+
+
 class Linker:
+    __slots__ = ("output_file", "debug_file", "import_library", "ignore_import_library", "entry_point", "libraries",
+                 "ignore_libraries", "options")
+
     def __init__(self):
         self.output_file: str = ""
         self.debug_file: str = ""
@@ -740,18 +952,18 @@ class Linker:
                     else:
                         self.add_lib(macros, item)
                 else:
-                    self.__dict__[option_block.key].extend(replace_macros_list(macros, *item.get_list()))
+                    getattr(self, option_block.key).extend(replace_macros_list(macros, *item.get_list()))
                     
         elif not option_block.values:
             return
             
         elif option_block.key in {"output_file", "debug_file"}:
             # TODO: maybe split the extension for output_file, debug_file, or import_library?
-            self.__dict__[option_block.key] = clean_path(option_block.values[0], macros)
+            setattr(self, option_block.key, clean_path(option_block.values[0], macros))
             
         elif option_block.key in {"import_library", "entry_point"}:
             # TODO: maybe split the extension for output_file, debug_file, or import_library?
-            self.__dict__[option_block.key] = replace_macros(option_block.values[0], macros)
+            setattr(self, option_block.key, replace_macros(option_block.values[0], macros))
             
         elif option_block.key == "ignore_import_library":
             self.ignore_import_library = convert_bool_option(self.ignore_import_library, option_block)
@@ -859,24 +1071,6 @@ def check_if_file_exists(file_path: str, option_warning: classmethod) -> bool:
     return True
 
 
-def split_folders(path_list):
-    full_folder_paths = set()
-    
-    for folder_path in set(path_list):
-        # uhhhhhh
-        # current_path = list(os.path.split(folder_path)[0].split("/"))
-        current_path = list(os.path.split(folder_path)[0].split("/"))
-        if not current_path:
-            continue
-        folder_list = [current_path[0]]
-        del current_path[0]
-        for folder in current_path:
-            folder_list.append(folder_list[-1] + "/" + folder)
-        full_folder_paths.update(folder_list)
-    
-    return full_folder_paths
-
-
 def replace_macros_list(macros, *value_list):
     value_list = list(value_list)
     for index, item in enumerate(value_list):
@@ -885,6 +1079,7 @@ def replace_macros_list(macros, *value_list):
 
 
 def replace_macros(string: str, macros: Dict[str, str]):
+    COUNTERS["replace_macros"] += 1
     if "$" in string:
         potential_macros = [macro for macro in macros if macro in string]
         while potential_macros:
@@ -0,0 +1,268 @@
+# ==================================================================================================
+# Query Mode
+# answers which projects, configs and outputs a change to some files will rebuild, without generating anything
+# the index is kept in the hashes folder, and only rebuilt if a qpc script, base file or glob changed,
+# if only source files or headers changed, just those are scanned again
+# ==================================================================================================
+
+import os
+import sys
+import json
+from contextlib import redirect_stdout
+from time import perf_counter
+
+import qpc_hash
+import qpc_c_parser
+from qpc_args import args
+from qpc_base import posix_path, posix_abs_path, create_directory, glob_files, QPC_HASH_DIR
+from qpc_parser import Parser
+
+
+QUERY_INDEX_VERSION = 3
+
+
+def get_query_index_path() -> str:
+    # same arguments as the run hash, since those change what projects and configs there are
+    return QPC_HASH_DIR + "query_" + qpc_hash.get_run_args_hash() + ".json"
+
+
+def _abs_path(file_path: str) -> str:
+    return posix_abs_path(file_path)
+
+
+def _get_config_name(project_pass) -> str:
+    return f"{project_pass.config_name}|{project_pass.platform.name.lower()}|{project_pass.arch.name.lower()}"
+
+
+def load_query_index() -> dict:
+    try:
+        with open(get_query_index_path(), mode="r", encoding="utf-8") as index_file:
+            return json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+
+# returns why the index has to be rebuilt, or an empty string if it can be used
+def check_query_index(index: dict) -> str:
+    if not index:
+        return "no index with these arguments"
+    if index.get("version") != QUERY_INDEX_VERSION:
+        return "index version changed"
+    if index["tool_hash"] != qpc_hash.get_tool_hash():
+        return "qpc or generator scripts changed"
+
+    return qpc_hash.check_run_inputs(index["inputs"], index["globs"])
+
+
+# source files and headers changed since the index was written, these only need their includes scanned again
+# if a header was added to or removed from a directory includes were looked for in, any of them could have changed
+def get_changed_files(index: dict) -> list:
+    for directory, mtime in index["dirs"].items():
+        if qpc_c_parser.get_mtime(directory) != mtime:
+            return list(index["units"])
+    return [file_path for file_path, stat in index["files"].items() if qpc_hash.get_stat(file_path) != stat]
+
+
+# scans the changed files again, and updates the headers of every source file that used them
+def update_query_index(index: dict, changed_files: list) -> None:
+    changed_units = set()
+    for file_path in changed_files:
+        if file_path in index["units"]:
+            changed_units.add(file_path)
+        changed_units.update(index["headers"].get(file_path, ()))
+
+    unit_includes = {unit_path: set() for unit_path in changed_units}
+    current_dir = os.getcwd()
+    for include_group in index["include_groups"]:
+        source_files = [unit_path for unit_path in include_group["units"] if unit_path in changed_units]
+        if not source_files:
+            continue
+        # includes can be relative to the project directory
+        os.chdir(include_group["dir"])
+        found_includes = qpc_c_parser.get_includes_recursive(source_files, include_group["include_dirs"])
+        for source_file in source_files:
+            unit_includes[source_file].update(found_includes[source_file])
+    os.chdir(current_dir)
+
+    headers = index["headers"]
+    for header_path in list(headers):
+        unit_paths = [unit_path for unit_path in headers[header_path] if unit_path not in changed_units]
+        if unit_paths:
+            headers[header_path] = unit_paths
+        else:
+            del headers[header_path]
+    
+    for unit_path, include_paths in unit_includes.items():
+        for header_path in include_paths:
+            headers.setdefault(header_path, []).append(unit_path)
+    for header_path in {header_path for include_paths in unit_includes.values() for header_path in include_paths}:
+        headers[header_path].sort()
+
+    old_files = index["files"]
+    changed_files = set(changed_files)
+    index["files"] = {file_path: old_files[file_path] if file_path in old_files and file_path not in changed_files
+                      else qpc_hash.get_stat(file_path) for file_path in (*index["units"], *headers)}
+    index["dirs"] = dict(qpc_c_parser.DIR_MTIMES)
+
+
+def build_query_index(generator_list: list) -> dict:
+    parser = Parser()
+    input_paths = set(qpc_hash.RUN_INPUTS)
+    info = parser.parse_base_info(args.base_file)
+    # a change to one of these can change anything
+    base_inputs = [file_path for file_path in qpc_hash.RUN_INPUTS if file_path not in input_paths]
+
+    units = {}  # translation unit -> {project script: [configs]}
+    unit_includes = {}  # translation unit -> headers it includes
+    projects = {}
+    project_inputs = {}  # qpc script -> project scripts that use it
+    index_include_groups = []  # for scanning changed files again, their include dirs are relative to the project
+
+    for project_def in info.projects:
+        project_script = project_def.path
+        valid_generators = [generator for generator in generator_list
+                            if project_def.platforms.intersection(generator.get_supported_platforms())]
+        if not valid_generators:
+            continue
+
+        project_dir = os.path.split(project_script)[0]
+        if project_dir and project_dir != args.root_dir:
+            os.chdir(project_dir)
+
+        project = parser.parse_project(project_def, project_script, info, valid_generators)
+        if project:
+            project_info = projects[project_script] = {"name": project.get_display_name(), "configs": {}}
+
+            # files are grouped by include directories, so each group is scanned together
+            include_groups = {}
+            for project_pass in project.get_all_passes():
+                config_name = _get_config_name(project_pass)
+                general = project_pass.config.general
+                project_info["configs"][config_name] = _abs_path(os.path.join(general.out_dir, general.out_name))
+
+                for script_path in project_pass.hash_list:
+                    qpc_hash.add_run_input(script_path)
+                    project_inputs.setdefault(_abs_path(script_path), set()).add(project_script)
+
+                for pattern in project_pass.get_glob_files():
+                    qpc_hash.add_run_glob(pattern, glob_files(pattern))
+
+                include_group = include_groups.setdefault(tuple(general.include_directories), set())
+                for source_file in project_pass.source_files:
+                    unit_path = _abs_path(source_file)
+                    include_group.add(source_file)
+                    units.setdefault(unit_path, {}).setdefault(project_script, []).append(config_name)
+
+            for include_dirs, source_files in include_groups.items():
+                source_files = list(source_files)
+                found_includes = qpc_c_parser.get_includes_recursive(source_files, list(include_dirs))
+                for source_file in source_files:
+                    unit_includes.setdefault(_abs_path(source_file), set()).update(found_includes[source_file])
+                index_include_groups.append({"dir": posix_path(os.getcwd()), "include_dirs": list(include_dirs),
+                                             "units": sorted(_abs_path(source_file) for source_file in source_files)})
+
+        if project_dir and project_dir != args.root_dir:
+            os.chdir(args.root_dir)
+
+    headers = {}
+    for unit_path, include_paths in unit_includes.items():
+        for header_path in include_paths:
+            headers.setdefault(header_path, []).append(unit_path)
+
+    files = {}
+    for file_path in (*units, *headers):
+        files[file_path] = qpc_hash.get_stat(file_path)
+
+    return {
+        "version": QUERY_INDEX_VERSION,
+        "args": qpc_hash._get_run_hash_args(),
+        "tool_hash": qpc_hash.get_tool_hash(),
+        "inputs": qpc_hash.get_run_inputs(),
+        "globs": qpc_hash.RUN_GLOBS,
+        "base_inputs": base_inputs,
+        "files": files,
+        "dirs": dict(qpc_c_parser.DIR_MTIMES),
+        "headers": {header_path: sorted(unit_paths) for header_path, unit_paths in headers.items()},
+        "units": units,
+        "project_inputs": {script_path: sorted(scripts) for script_path, scripts in project_inputs.items()},
+        "include_groups": index_include_groups,
+        "projects": projects,
+    }
+
+
+def write_query_index(index: dict) -> None:
+    create_directory(QPC_HASH_DIR)
+    with open(get_query_index_path(), mode="w", encoding="utf-8") as index_file:
+        json.dump(index, index_file)
+
+
+def query_paths(index: dict, file_paths: list) -> dict:
+    result_paths = {}
+    result_projects = {}
+    unknown_paths = []
+
+    def add_project(_project_script: str, _configs, projects_found: set) -> None:
+        project_info = index["projects"][_project_script]
+        if _project_script not in result_projects:
+            result_projects[_project_script] = {"name": project_info["name"], "configs": set()}
+        result_projects[_project_script]["configs"].update(_configs)
+        projects_found.add(_project_script)
+
+    for file_path in file_paths:
+        units_found = set()
+        projects_found = set()
+
+        if file_path in index["units"]:
+            units_found.add(file_path)
+        units_found.update(index["headers"].get(file_path, ()))
+
+        for unit_path in units_found:
+            for project_script, configs in index["units"][unit_path].items():
+                add_project(project_script, configs, projects_found)
+
+        if file_path in index["project_inputs"]:
+            for project_script in index["project_inputs"][file_path]:
+                add_project(project_script, index["projects"][project_script]["configs"], projects_found)
+
+        elif file_path in index["base_inputs"]:
+            # a base file, this can change anything
+            for project_script, project_info in index["projects"].items():
+                add_project(project_script, project_info["configs"], projects_found)
+
+        if not units_found and not projects_found:
+            unknown_paths.append(file_path)
+
+        result_paths[file_path] = {"units": sorted(units_found), "projects": sorted(projects_found)}
+
+    for project_script, project_result in result_projects.items():
+        configs = index["projects"][project_script]["configs"]
+        project_result["configs"] = sorted(project_result["configs"])
+        project_result["outputs"] = sorted({configs[config] for config in project_result["configs"]})
+
+    return {"paths": result_paths, "projects": result_projects, "unknown": unknown_paths}
+
+
+# prints json to stdout, anything printed while building the index goes to stderr
+def run_query(generator_list: list, file_paths: list) -> None:
+    start_time = perf_counter()
+    index = load_query_index()
+    reason = check_query_index(index)
+
+    changed_files = []
+    if reason:
+        with redirect_stdout(sys.stderr):
+            print("Building Query Index: " + reason)
+            index = build_query_index(generator_list)
+        write_query_index(index)
+        qpc_c_parser.save_include_cache()
+    else:
+        changed_files = get_changed_files(index)
+        if changed_files:
+            update_query_index(index, changed_files)
+            write_query_index(index)
+            qpc_c_parser.save_include_cache()
+
+    result = query_paths(index, file_paths)
+    result["index"] = {"rebuilt": bool(reason), "updated": len(changed_files),
+                       "time": round(perf_counter() - start_time, 4)}
+    print(json.dumps(result, indent=1))
@@ -6,6 +6,8 @@ from __future__ import annotations
 import os
 from typing import List
 from re import compile
+import qpc_trace
+from qpc_trace import COUNTERS
 from qpc_logging import warning, error, warning_no_line, verbose, verbose_color, print_color, Color
 
 
@@ -229,7 +231,9 @@ def _print_solved_condition(split_string: list, result: int):
 
 
 def solve_condition(qpcblock: QPCBlockBase, condition: str, macros: dict) -> int:
+    COUNTERS["solve_condition"] += 1
     if not condition:
+        COUNTERS["solve_condition.no_condition"] += 1
         return True
     
     solved_cond = condition
@@ -333,10 +337,13 @@ def add_spacing_to_condition(cond):
 
 def read_file(path: str, keep_quotes: bool = False, allow_escapes: bool = True, multiline_quotes: bool = False) -> QPCBlockBase:
     path = posix_path(path)
-    lexer = QPCLexer(path, keep_quotes, allow_escapes, multiline_quotes)
-    qpc_file = QPCBlockBase(path)
-    path = posix_path(os.getcwd() + "/" + path)
-    parse_recursive(lexer, qpc_file, path)
+    with qpc_trace.span("lex", {"path": path}):
+        lexer = QPCLexer(path, keep_quotes, allow_escapes, multiline_quotes)
+        COUNTERS["lex.files"] += 1
+        COUNTERS["lex.chars"] += len(lexer.file)
+        qpc_file = QPCBlockBase(path)
+        path = posix_path(os.getcwd() + "/" + path)
+        parse_recursive(lexer, qpc_file, path)
     return qpc_file
 
 
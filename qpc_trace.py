@@ -0,0 +1,149 @@
+# ==================================================================================================
+# Tracing
+# nested spans of what qpc spent time on, written in the chrome trace event format
+# open the file in https://ui.perfetto.dev or chrome://tracing
+# when disabled, span() just returns the same empty object, so leaving spans in hot code is fine
+# ==================================================================================================
+
+import os
+import json
+import glob
+from collections import Counter
+from functools import wraps
+from time import perf_counter_ns
+
+
+TRACE_ENABLED = False
+TRACE_EVENTS = []  # (name, start ns, end ns, args)
+
+_TRACE_START = perf_counter_ns()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        TRACE_EVENTS.append((self.name, self.start, perf_counter_ns(), self.args))
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name: str, args: dict = None):
+    if TRACE_ENABLED:
+        return _Span(name, args)
+    return NULL_SPAN
+
+
+# for spans that start and end in different functions
+def begin_span(name: str, args: dict = None):
+    span_obj = span(name, args)
+    span_obj.__enter__()
+    return span_obj
+
+
+def end_span(span_obj) -> None:
+    if span_obj is not None:
+        span_obj.__exit__(None, None, None)
+
+
+def enable() -> None:
+    global TRACE_ENABLED
+    TRACE_ENABLED = True
+
+
+def get_trace() -> dict:
+    pid = os.getpid()
+    events = []
+    for name, start, end, args in TRACE_EVENTS:
+        event = {"name": name, "cat": "qpc", "ph": "X", "pid": pid, "tid": 0,
+                 "ts": (start - _TRACE_START) / 1000, "dur": (end - start) / 1000}
+        if args:
+            event["args"] = args
+        events.append(event)
+    # chrome wants parents before children when they start at the same time
+    events.sort(key=lambda _event: (_event["ts"], -_event["dur"]))
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_trace(path: str) -> None:
+    with open(path, mode="w", encoding="utf-8") as trace_file:
+        json.dump(get_trace(), trace_file)
+
+
+# total time spent in each kind of span, time in nested spans of the same name isn't counted twice
+def get_span_totals() -> dict:
+    totals = {}
+    open_ends = {}
+    for name, start, end, args in sorted(TRACE_EVENTS, key=lambda event: (event[1], -event[2])):
+        total = totals.setdefault(name, [0, 0])
+        total[0] += 1
+        if start >= open_ends.get(name, 0):
+            total[1] += end - start
+            open_ends[name] = end
+    return totals
+
+
+def get_span_totals_json() -> dict:
+    return {name: {"count": count, "time": total / 1_000_000_000} for name, (count, total) in get_span_totals().items()}
+
+
+def print_span_totals() -> None:
+    print(f"{'Span':<32} {'Count':>8} {'Time':>10}")
+    for name, (count, total) in sorted(get_span_totals().items(), key=lambda item: item[1][1], reverse=True):
+        print(f"{name:<32} {count:>8} {total / 1_000_000_000:>10.4f}")
+
+
+# ==================================================================================================
+# Counters
+# how many times hot operations ran, always counted since incrementing these is cheap
+# file system calls are only counted if count_file_system_calls is called, since that wraps os and glob functions
+# ==================================================================================================
+
+COUNTERS = Counter()
+
+
+def _count_calls(name: str, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        COUNTERS[name] += 1
+        return func(*args, **kwargs)
+    return wrapper
+
+
+def count_file_system_calls() -> None:
+    os.path.isfile = _count_calls("os.path.isfile", os.path.isfile)
+    os.path.isdir = _count_calls("os.path.isdir", os.path.isdir)
+    os.listdir = _count_calls("os.listdir", os.listdir)
+    glob.glob = _count_calls("glob.glob", glob.glob)
+
+
+def write_report(path: str, run_args: dict) -> None:
+    report = {
+        "args": run_args,
+        "counters": dict(sorted(COUNTERS.items())),
+        "timings": get_span_totals_json(),
+        "time": (perf_counter_ns() - _TRACE_START) / 1_000_000_000,
+    }
+    with open(path, mode="w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=1)